@@ -0,0 +1,94 @@
+"""
+Regression check and micro-benchmark of the dimension extraction engine.
+
+    python -m benchmarks.bench_dimensions [--snapshot PATH] [--repeat N]
+
+Every entry of dimensions_corpus.json must still be extracted the same way.
+Throughput is measured on descriptions from the products snapshot
+(sheets/shoper_all_products.jsonl) when it exists, otherwise on the corpus.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import config
+from connections.descriptions import html_to_text
+from connections.dimensions import extract, find_dimensions
+from benchmarks.legacy import legacy_find_dimensions
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), 'dimensions_corpus.json')
+
+
+def check_corpus():
+    """Return a list of corpus entries the engine no longer extracts as expected."""
+    with open(CORPUS_PATH, encoding='utf-8') as f:
+        corpus = json.load(f)
+
+    failures = []
+    for entry in corpus:
+        match = extract(entry['text'])
+        result = {
+            'dimensions': str(match) if match else '',
+            'kind': match.kind if match else None,
+            'values': list(match.values) if match else [],
+            'units': list(match.units) if match else [],
+        }
+        expected = {key: entry[key] for key in result}
+        if result != expected:
+            failures.append({'text': entry['text'], 'expected': expected, 'got': result})
+
+    return failures, [entry['text'] for entry in corpus]
+
+
+def load_texts(snapshot_path):
+    """Return cleaned description texts of every product in the snapshot."""
+    texts = []
+    with open(snapshot_path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                product = json.loads(line)
+                texts.append(html_to_text(product['translations']['pl_PL']['description']))
+    return texts
+
+
+def measure(function, texts, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            function(text)
+    elapsed = time.perf_counter() - start
+    return {'seconds': round(elapsed, 4), 'texts_per_second': round(len(texts) * repeat / elapsed) if elapsed else None}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--snapshot', default=os.path.join(config.SHEETS_DIR, 'shoper_all_products.jsonl'))
+    parser.add_argument('--repeat', type=int, default=None)
+    args = parser.parse_args()
+
+    failures, texts = check_corpus()
+    source = 'corpus'
+    if os.path.exists(args.snapshot):
+        texts = load_texts(args.snapshot)
+        source = args.snapshot
+    repeat = args.repeat or (1 if source != 'corpus' else 2000)
+
+    mismatches = sum(1 for text in texts if find_dimensions(text) != legacy_find_dimensions(text))
+    report = {
+        'source': source,
+        'texts': len(texts),
+        'repeat': repeat,
+        'corpus_failures': failures,
+        'legacy_mismatches': mismatches,
+        'engine': measure(find_dimensions, texts, repeat),
+        'legacy': measure(legacy_find_dimensions, texts, repeat),
+    }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+    return 1 if failures or mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,51 @@
+"""
+Cold-start times of the entry points, each measured in a fresh interpreter.
+
+    python -m benchmarks.bench_startup [--repeat N]
+
+'menu' starts main.py and quits right away, 'cli' prints the CLI help,
+the commands import everything they load before doing any work.
+Prints the median and best time of every entry point as JSON.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRY_POINTS = {
+    'menu': ([sys.executable, 'main.py'], 'q\n'),
+    'cli': ([sys.executable, 'cli.py', '--help'], None),
+    'sync': ([sys.executable, '-c', 'import cli; from connections import ShoperAPIClient'], None),
+    'report': ([sys.executable, '-c', 'import cli; from connections import ShoperAPIClient, GSheetsClient'], None),
+    'allegro': ([sys.executable, '-c', 'import cli; from connections import ShoperAPIClient, GSheetsClient, Allegro'], None),
+}
+
+
+def measure(command, stdin, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, input=stdin, cwd=ROOT_DIR, text=True, capture_output=True, check=True)
+        timings.append(time.perf_counter() - start)
+    return {'median': round(statistics.median(timings), 3), 'best': round(min(timings), 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    report = {
+        'python': measure([sys.executable, '-c', 'pass'], None, args.repeat),
+        **{name: measure(command, stdin, args.repeat) for name, (command, stdin) in ENTRY_POINTS.items()},
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Benchmark of GSheetsClient.transform_data against the previous astype(str) serialiser.
+
+    python -m benchmarks.bench_transform [--rows N]
+
+Builds a synthetic report-like frame and prints time and peak memory of both as JSON.
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from connections.gsheets_connect import GSheetsClient
+from benchmarks.legacy import legacy_transform_data
+
+
+def build_frame(rows):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'EAN': [f'59{index:011d}' for index in range(rows)],
+        'Nazwa': [f'Etui na telefon model {index % 500}' for index in range(rows)],
+        'ID produktu': np.arange(rows),
+        'Typ produktu': pd.Series(rng.choice(['Etui na telefon', 'Szkło na telefon', 'Pasek do smartwatcha'], rows), dtype=object),
+        'Wymiary atrybut': pd.Series(rng.choice(['', '15 x 7'], rows), dtype=object),
+        'Cena': np.where(rng.random(rows) < 0.1, np.nan, rng.random(rows) * 100),
+        'Data dodania produktu': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 365, rows), unit='D'),
+        'Opis bez HTML': ['Etui wykonane z wytrzymałego materiału TPU. ' * 5] * rows,
+        'Komentarz': [None] * rows,
+    })
+
+
+def measure(function, df):
+    tracemalloc.start()
+    start = time.perf_counter()
+    function(df)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'seconds': round(elapsed, 3), 'peak_mb': round(peak / 2 ** 20, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000)
+    args = parser.parse_args()
+
+    df = build_frame(args.rows)
+    client = GSheetsClient(credentials=None, sheet_id=None, sheet_name=None)
+    report = {
+        'rows': args.rows,
+        'transform_data': measure(client.transform_data, df),
+        'legacy': measure(legacy_transform_data, df),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""In-memory stand-ins for gspread Spreadsheet and Worksheet, enough for GSheetsClient.save_data."""
+from gspread.exceptions import WorksheetNotFound
+from gspread.utils import a1_to_rowcol
+
+
+class FakeWorksheet:
+
+    def __init__(self, title, sheet_id, index, values=None):
+        self.title = title
+        self.id = sheet_id
+        self.index = index
+        self.values = [list(row) for row in (values or [])]
+        self.requests = 0
+        self.cells_written = 0
+
+    def get_all_values(self, **kwargs):
+        self.requests += 1
+        return [list(row) for row in self.values]
+
+    def clear(self):
+        self.requests += 1
+        self.values = []
+
+    def _write(self, values, range_name=None):
+        first_row, first_column = a1_to_rowcol(range_name.split(':')[0]) if range_name else (1, 1)
+        for offset, row in enumerate(values):
+            while len(self.values) < first_row + offset:
+                self.values.append([])
+            current = self.values[first_row + offset - 1]
+            current.extend([''] * (first_column - 1 + len(row) - len(current)))
+            current[first_column - 1:first_column - 1 + len(row)] = row
+            self.cells_written += len(row)
+
+    def update(self, values, range_name=None, **kwargs):
+        self.requests += 1
+        self._write(values, range_name)
+
+    def batch_update(self, data, **kwargs):
+        self.requests += 1
+        for update in data:
+            self._write(update['values'], update['range'])
+
+    def append_rows(self, values, **kwargs):
+        self.requests += 1
+        self._write(values, f'A{len(self.values) + 1}')
+
+
+class FakeSpreadsheet:
+
+    def __init__(self):
+        self.worksheets = []
+        self.requests = 0
+
+    def add_worksheet(self, title, rows=None, cols=None):
+        self.requests += 1
+        worksheet = FakeWorksheet(title, len(self.worksheets) + 1 + max([0] + [w.id for w in self.worksheets]), len(self.worksheets))
+        self.worksheets.append(worksheet)
+        return worksheet
+
+    def worksheet(self, title):
+        for worksheet in self.worksheets:
+            if worksheet.title == title:
+                return worksheet
+        raise WorksheetNotFound(title)
+
+    def del_worksheet(self, worksheet):
+        self.requests += 1
+        self.worksheets.remove(worksheet)
+
+    def batch_update(self, body):
+        self.requests += 1
+        for request in body['requests']:
+            if 'updateSheetProperties' in request:
+                properties = request['updateSheetProperties']['properties']
+                worksheet = self._by_id(properties['sheetId'])
+                worksheet.title = properties.get('title', worksheet.title)
+                grid = properties.get('gridProperties', {})
+                if 'rowCount' in grid:
+                    del worksheet.values[grid['rowCount']:]
+                if 'columnCount' in grid:
+                    worksheet.values = [row[:grid['columnCount']] for row in worksheet.values]
+            elif 'updateCells' in request:
+                worksheet = self._by_id(request['updateCells']['range']['sheetId'])
+                worksheet.values = [[''] * len(row) for row in worksheet.values]
+            elif 'copyPaste' in request:
+                source, destination = request['copyPaste']['source'], request['copyPaste']['destination']
+                values = [
+                    row[source['startColumnIndex']:source['endColumnIndex']]
+                    for row in self._by_id(source['sheetId']).values[source['startRowIndex']:source['endRowIndex']]
+                ]
+                self._by_id(destination['sheetId'])._write(values)
+            elif 'deleteSheet' in request:
+                self.worksheets = [w for w in self.worksheets if w.id != request['deleteSheet']['sheetId']]
+            elif 'deleteDimension' in request:
+                dimension = request['deleteDimension']['range']
+                worksheet = next(w for w in self.worksheets if w.id == dimension['sheetId'])
+                del worksheet.values[dimension['startIndex']:dimension['endIndex']]
+
+    def _by_id(self, sheet_id):
+        return next(w for w in self.worksheets if w.id == sheet_id)
+
+    def requests_total(self):
+        return self.requests + sum(worksheet.requests for worksheet in self.worksheets)
@@ -0,0 +1,138 @@
+"""
+Local stand-in for the Shoper REST API.
+
+Serves /webapi/rest/auth and paginated /webapi/rest/<resource> lists from in-memory data,
+with a configurable latency and share of 429 responses. Supports the 'edit_date >='
+and 'stock.code' (equal / IN) filters used by the client.
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+class FakeShoperServer:
+
+    def __init__(self, data, latency=0.0, rate_429=0.0, port=0, seed=0, token_ttl=2592000):
+        """
+        Args:
+            data (dict): endpoint -> list of records, see benchmarks.synthetic.resources.
+            latency (float): Seconds added to every response.
+            rate_429 (float): Share (0-1) of list requests answered with 429 Too Many Requests.
+            port (int): Port to listen on, 0 picks a free one.
+            token_ttl (float): Seconds an access token is valid - requests with an expired one get 401.
+        """
+        self.data = data
+        self.latency = latency
+        self.rate_429 = rate_429
+        self.random = random.Random(seed)
+        self.token_ttl = token_ttl
+        self.tokens = {}
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.throttled = 0
+        self.bytes_sent = 0
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return f'http://{host}:{port}'
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def stats(self):
+        return {'requests': self.requests, 'throttled': self.throttled, 'bytes_sent': self.bytes_sent, 'tokens_issued': len(self.tokens)}
+
+    @staticmethod
+    def _filter(records, filters):
+        for field, condition in filters.items():
+            if field == 'edit_date' and isinstance(condition, dict) and '>=' in condition:
+                records = [record for record in records if record.get('edit_date', '') >= condition['>=']]
+            elif field == 'stock.code':
+                codes = set(condition['IN']) if isinstance(condition, dict) else {condition}
+                records = [record for record in records if record['stock']['code'] in codes]
+        return records
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, body, headers=None):
+                payload = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(payload)
+                with fake.lock:
+                    fake.bytes_sent += len(payload)
+
+            def do_POST(self):
+                if self.path.startswith('/webapi/rest/auth'):
+                    with fake.lock:
+                        token = f'benchmark-token-{len(fake.tokens) + 1}'
+                        fake.tokens[token] = time.monotonic() + fake.token_ttl
+                    self._send(200, {'access_token': token, 'expires_in': fake.token_ttl, 'token_type': 'bearer'})
+                else:
+                    self._send(404, {'error': 'not found'})
+
+            def do_GET(self):
+                time.sleep(fake.latency)
+                token = self.headers.get('Authorization', '').removeprefix('Bearer ')
+                if fake.tokens.get(token, 0) < time.monotonic():
+                    self._send(401, {'error': 'unauthorized_client', 'error_description': 'Invalid token'})
+                    return
+
+                with fake.lock:
+                    fake.requests += 1
+                    throttled = fake.random.random() < fake.rate_429
+                    fake.throttled += throttled
+                if throttled:
+                    self._send(429, {'error': 'Too Many Requests'}, {'Retry-After': '0'})
+                    return
+
+                url = urlparse(self.path)
+                parts = url.path.strip('/').split('/')
+                if len(parts) < 3 or parts[2] not in fake.data:
+                    self._send(404, {'error': 'not found'})
+                    return
+
+                records = fake.data[parts[2]]
+                if len(parts) == 4:
+                    key = next(iter(records[0])) if records else None
+                    found = [record for record in records if str(record.get(key)) == parts[3]]
+                    self._send(200 if found else 404, found[0] if found else {'error': 'not found'})
+                    return
+
+                query = parse_qs(url.query)
+                if 'filters' in query:
+                    records = fake._filter(records, json.loads(query['filters'][0]))
+                limit = int(query.get('limit', ['50'])[0])
+                page = int(query.get('page', ['1'])[0])
+                pages = (len(records) + limit - 1) // limit
+                self._send(200, {
+                    'count': str(len(records)),
+                    'pages': pages,
+                    'page': page,
+                    'list': records[(page - 1) * limit:page * limit],
+                }, {'X-Shop-Api-Limit': '1000', 'X-Shop-Api-Calls': '1'})
+
+        return Handler
@@ -0,0 +1,35 @@
+import re
+
+
+def legacy_find_dimensions(description):
+    """Regex cascade used before connections.dimensions, kept as a reference for benchmarks."""
+    three_dim_pattern = r'(\d+[.,]\d+|\d+)\s*(?:cm|mm)?\s*(?:[xX×]|-)\s*(\d+[.,]\d+|\d+)\s*(?:cm|mm)?\s*(?:[xX×]|-)\s*(\d+[.,]\d+|\d+)\s*(?:cm|mm)?'
+    three_dim_match = re.search(three_dim_pattern, description)
+    if three_dim_match:
+        return f"{three_dim_match.group(1)} x {three_dim_match.group(2)} x {three_dim_match.group(3)}"
+
+    dim_labeled_pattern = r'(?:Długość|Dlugosc)[^:]*:\s*(\d+[.,]\d+|\d+)\s*(?:cm|mm)?.*?(?:Szerokość|Szerokosc)[^:]*:\s*(\d+[.,]\d+|\d+)\s*(?:cm|mm)?'
+    dim_labeled_match = re.search(dim_labeled_pattern, description, re.IGNORECASE)
+    if dim_labeled_match:
+        return f"{dim_labeled_match.group(1)} x {dim_labeled_match.group(2)}"
+
+    xy_pattern = r'X-[^:]*:\s*(\d+[.,]\d+|\d+)\s*(?:cm|mm)?.*?Y-[^:]*:\s*(\d+[.,]\d+|\d+)\s*(?:cm|mm)?'
+    xy_match = re.search(xy_pattern, description, re.IGNORECASE)
+    if xy_match:
+        return f"{xy_match.group(1)} x {xy_match.group(2)}"
+
+    dimension_pattern = r'(\d+[.,]\d+|\d+)\s*(?:cm|mm)?\s*(?:[xX×]|-)\s*(\d+[.,]\d+|\d+)\s*(?:cm|mm)?'
+    dimensions_match = re.search(dimension_pattern, description)
+    if dimensions_match:
+        return f"{dimensions_match.group(1)} x {dimensions_match.group(2)}"
+
+    return ''
+
+
+def legacy_transform_data(df):
+    """GSheetsClient.transform_data before the typed serialiser, kept as a reference for benchmarks."""
+    df_string = df.astype(str)
+    header = df_string.columns.values.tolist()
+    data = df_string.values.tolist()
+
+    return [header] + data
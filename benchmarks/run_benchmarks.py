@@ -0,0 +1,137 @@
+"""
+End-to-end benchmark against a local fake Shoper API and an in-memory Google Sheet.
+
+    python -m benchmarks.run_benchmarks [--products N] [--latency MS] [--rate-429 SHARE] [--output FILE]
+
+Times get_all_products, get_all_active_products_formatted, find_dimensions_description
+and save_data (first upload and a diff sync) and prints the results as JSON.
+Snapshots and reports are written to a temporary directory, not to sheets/.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import config
+import connections.gsheets_connect
+from connections.shoper_connect import ShoperAPIClient
+from connections.gsheets_connect import GSheetsClient
+from connections.metrics import metrics
+from benchmarks.synthetic import resources
+from benchmarks.fake_shoper import FakeShoperServer
+from benchmarks.fake_gspread import FakeSpreadsheet
+from benchmarks.legacy import legacy_transform_data
+
+
+def measure(function, *args, **kwargs):
+    """Run a function with its output silenced. Returns (result, timing dict)."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = function(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, {'seconds': round(elapsed, 3), 'peak_mb': round(peak / 2 ** 20, 1)}
+
+
+def bench_descriptions(client, products):
+    descriptions = [product['translations']['pl_PL']['description'] for product in products]
+    _, timing = measure(lambda: [client.find_dimensions_description(description) for description in descriptions])
+    timing['items_per_second'] = round(len(descriptions) / timing['seconds']) if timing['seconds'] else None
+    return timing
+
+
+def bench_save_data(report):
+    spreadsheet = FakeSpreadsheet()
+    worksheet = spreadsheet.add_worksheet(config.SHEET_NAME)
+    client = GSheetsClient(credentials=None, sheet_id=None, sheet_name=config.SHEET_NAME)
+    client.sheet, client.worksheet = spreadsheet, worksheet
+
+    saved, first_upload = measure(client.save_data, report, delay=0)
+    first_upload.update(saved=saved, requests=spreadsheet.requests_total())
+
+    # Change every tenth row and drop the last one - what a typical daily run looks like
+    changed = report.iloc[:-1].copy()
+    changed.loc[changed.index[::10], 'Ilość'] = '1'
+    requests_before = spreadsheet.requests_total()
+    saved, diff_sync = measure(client.save_data, changed, delay=0)
+    diff_sync.update(saved=saved, requests=spreadsheet.requests_total() - requests_before)
+
+    # A sheet written by the old text serialiser, with notes typed in by hand - the first sync must keep them
+    values = legacy_transform_data(report)
+    manual_indexes = [values[0].index(column) for column in config.GSHEETS_MANUAL_COLUMNS if column in values[0]]
+    for row in values[1:]:
+        for index in manual_indexes:
+            row[index] = 'note'
+    legacy = FakeSpreadsheet()
+    client.sheet, client.worksheet = legacy, legacy.add_worksheet(config.SHEET_NAME)
+    client.worksheet.values = values
+    saved, legacy_sync = measure(client.save_data, report, delay=0)
+    rows = client.worksheet.get_all_values()
+    legacy_sync.update(
+        saved=saved,
+        requests=legacy.requests_total(),
+        rows=len(rows) - 1,
+        notes_kept=sum(1 for row in rows[1:] if manual_indexes and all(row[index] == 'note' for index in manual_indexes)),
+    )
+
+    return {'first_upload': first_upload, 'diff_sync': diff_sync, 'legacy_sync': legacy_sync}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=5000)
+    parser.add_argument('--latency', type=float, default=20, help='Fake API latency per request, in milliseconds.')
+    parser.add_argument('--rate-429', type=float, default=0.0, help='Share of requests answered with 429.')
+    parser.add_argument('--shoper-rate', type=float, default=1000, help='Client rate limit (requests/s) used in the run.')
+    parser.add_argument('--output', help='Also write the JSON results to this file.')
+    args = parser.parse_args()
+
+    data = resources(args.products)
+    results = {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'parameters': vars(args),
+        'config': {
+            'SHOPER_LIMIT': config.SHOPER_LIMIT,
+            'SHOPER_WORKERS': config.SHOPER_WORKERS,
+            'PROCESSING_CHUNK_SIZE': config.PROCESSING_CHUNK_SIZE,
+            'DESCRIPTION_CACHE': config.DESCRIPTION_CACHE,
+        },
+    }
+
+    with tempfile.TemporaryDirectory() as sheets_dir, FakeShoperServer(data, args.latency / 1000, args.rate_429) as server:
+        config.SHEETS_DIR = sheets_dir
+        connections.gsheets_connect.SHEETS_DIR = sheets_dir
+        config.SHOPER_RATE = config.SHOPER_BURST = args.shoper_rate
+
+        client = ShoperAPIClient(server.url, 'benchmark', 'benchmark')
+        _, results['connect'] = measure(client.connect)
+
+        count, timing = measure(client.get_all_products, incremental=False)
+        results['get_all_products'] = {**timing, 'products': count, 'server': server.stats(), 'rate_limiter': client.rate_limiter.stats()}
+
+        report, timing = measure(client.get_all_active_products_formatted)
+        results['get_all_active_products_formatted'] = {**timing, 'rows': len(report)}
+
+        results['find_dimensions_description'] = bench_descriptions(client, data['products'])
+        results['save_data'] = bench_save_data(report)
+        results['metrics'] = metrics.snapshot()
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+
+
+if __name__ == '__main__':
+    main()
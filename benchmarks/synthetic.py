@@ -0,0 +1,60 @@
+"""Synthetic Shoper data shaped like the API payloads the tool works with."""
+import random
+
+PRODUCT_TYPES = [
+    'Etui na telefon', 'Szkło na telefon', 'Pasek do smartwatcha', 'Etui na tablet',
+    'Kabel USB', 'Folia na telefon', 'Ładowarka'
+]
+DESCRIPTIONS = [
+    '<p>Etui silikonowe.</p><p>Wymiary: 15,5 x 7.2 x 0.8 cm</p>',
+    '<div><b>Długość:</b> 12 cm<br><b>Szerokość:</b> 6,5 cm</div>',
+    '<p>X-wymiar: 10 mm, Y-wymiar: 20mm</p>',
+    '<h2>Opis</h2><p>Szkło hartowane 9H, rozmiar 14,7×7,1 cm</p>',
+    '<p>Wytrzymałe etui z materiału TPU, chroni przed upadkiem z 1,5 m.</p>' * 8,
+    '<ul><li>Etui&nbsp;silikonowe</li><li>kolor: czarny</li></ul><script>var x = 1;</script>',
+    '',
+]
+
+
+def products(count, seed=0):
+    rng = random.Random(seed)
+    for product_id in range(1, count + 1):
+        attributes = {}
+        if rng.random() < 0.9:
+            attributes['550'] = {'1370': rng.choice(PRODUCT_TYPES), '1160': rng.choice(['Seria A', 'Seria B', ''])}
+        if rng.random() < 0.3:
+            attributes['552'] = {'1191': str(rng.randint(1, 20)), '1196': str(rng.randint(1, 20)) if rng.random() < 0.7 else ''}
+        if rng.random() < 0.1:
+            attributes['561'] = {'1270': '5', '1271': 'obudowa 360'}
+        code = rng.choice(['590', '590', 'OUT590']) + f'{product_id:010d}'
+        yield {
+            'product_id': product_id,
+            'code': code,
+            'add_date': f'2023-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 12:00:00',
+            'edit_date': f'2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 08:00:00',
+            'attributes': attributes or [],
+            'stock': {'stock': rng.choice(['0', '5', '12']), 'code': code},
+            'translations': {'pl_PL': {
+                'name': rng.choice(['Etui Bewood', 'Etui Classic', 'Szkło Premium']) + f' {product_id}',
+                'description': rng.choice(DESCRIPTIONS),
+            }},
+        }
+
+
+def resources(count, seed=0):
+    """Return {endpoint: list of records} for every resource served by the fake Shoper API."""
+    rng = random.Random(seed)
+    return {
+        'products': list(products(count, seed)),
+        'categories': [{'category_id': index, 'translations': {'pl_PL': {'name': f'Kategoria {index}'}}} for index in range(1, max(2, count // 100))],
+        'producers': [{'producer_id': index, 'name': f'Producent {index}'} for index in range(1, max(2, count // 500))],
+        'attribute-groups': [{'attribute_group_id': group, 'name': f'Grupa {group}'} for group in (550, 552, 553, 555, 556, 560, 561, 562)],
+        'attributes': [
+            {'attribute_id': attribute, 'attribute_group_id': group, 'name': f'Atrybut {attribute}', 'type': rng.choice([0, 1, 2])}
+            for group, attribute_ids in {
+                550: (1370, 1160), 552: (1191, 1196), 553: (1192, 1193), 555: (1207, 1208),
+                556: (1217, 1218), 560: (1249, 1250), 561: (1270, 1271), 562: (1268, 1269),
+            }.items()
+            for attribute in attribute_ids
+        ],
+    }
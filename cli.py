@@ -0,0 +1,83 @@
+"""
+Non-interactive entry point for scheduled (cron) runs.
+
+    python cli.py sync [--full] [--async]
+    python cli.py report [--download] [--no-upload]
+    python cli.py allegro [--no-upload]
+
+Options given before the command:
+    --metrics-json FILE          write the run metrics as JSON
+    --metrics-prometheus FILE    write the run metrics as a Prometheus textfile
+
+Exits with status 1 when the command fails.
+"""
+import argparse
+import sys
+import config
+from connections.metrics import metrics
+import main as app
+
+
+def sync(args, shoper_client):
+    if args.full:
+        config.SHOPER_INCREMENTAL_SYNC = False
+    return app.download_products(shoper_client)
+
+
+def report(args, shoper_client):
+    return app.generate_report(shoper_client, download=args.download, upload=not args.no_upload)
+
+
+def allegro(args, shoper_client):
+    return app.generate_allegro_report(shoper_client, upload=not args.no_upload)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--metrics-json', help='Write the run metrics to this JSON file.')
+    parser.add_argument('--metrics-prometheus', help='Write the run metrics to this Prometheus textfile.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    sync_parser = commands.add_parser('sync', help='Download all data from Shoper (menu option 1).')
+    sync_parser.add_argument('--full', action='store_true', help='Download every product, not only the changed ones.')
+    sync_parser.add_argument('--async', dest='use_async', action='store_true', help='Use the asyncio client.')
+    sync_parser.set_defaults(function=sync)
+
+    report_parser = commands.add_parser('report', help='Generate the dimensions report (menu option 2).')
+    report_parser.add_argument('--download', action='store_true', help='Download products while building the report.')
+    report_parser.add_argument('--no-upload', action='store_true', help="Don't save the report to Google Sheets.")
+    report_parser.set_defaults(function=report)
+
+    allegro_parser = commands.add_parser('allegro', help='Generate Allegro offers to complete (menu option 3).')
+    allegro_parser.add_argument('--no-upload', action='store_true', help="Don't save the offers to Google Sheets.")
+    allegro_parser.set_defaults(function=allegro)
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if getattr(args, 'use_async', False):
+        config.SHOPER_ASYNC = True
+    if args.metrics_json:
+        config.METRICS_JSON_FILE = args.metrics_json
+    if args.metrics_prometheus:
+        config.METRICS_PROMETHEUS_FILE = args.metrics_prometheus
+
+    config.init_directories()
+    metrics.reset()
+    shoper_client = app.create_shoper_client()
+    try:
+        succeeded = args.function(args, shoper_client)
+    except Exception as e:
+        print(f'{args.command} failed: {str(e)}')
+        succeeded = False
+    finally:
+        shoper_client.close()
+    metrics.count('runs', status='ok' if succeeded else 'failed', command=args.command)
+    metrics.finish_run()
+    return 0 if succeeded else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,15 +1,49 @@
-from .env import load_environment
-
-load_environment()
-
+from .env import load_environment, get_env
 from .config import (
     SHEETS_DIR,
     SHOPER_LIMIT,
+    SHOPER_WORKERS,
+    SHOPER_ASYNC,
+    SHOPER_RATE,
+    SHOPER_BURST,
+    SHOPER_MAX_RETRIES,
+    SHOPER_TOKEN_REFRESH_MARGIN,
+    SHOPER_JOURNAL,
+    SHOPER_JOURNAL_MAX_AGE,
+    SHOPER_INCREMENTAL_SYNC,
+    SHOPER_SYNC_OVERLAP,
+    CATALOG_INDEX,
+    EXPORT_EXCEL,
+    PROCESSING_CHUNK_SIZE,
+    PARSING_WORKERS,
+    PARSING_CHUNK_SIZE,
+    DESCRIPTION_PREVIEW_LENGTH,
+    DESCRIPTION_CACHE,
+    DESCRIPTION_CACHE_MAX_ENTRIES,
+    DIMENSION_ATTRIBUTES,
+    PRODUCT_TYPE_ATTRIBUTE,
+    PRODUCT_SERIES_ATTRIBUTE,
+    ALLEGRO_EAN_COLUMN,
+    ALLEGRO_OFFER_ID_COLUMN,
+    ALLEGRO_COLUMNS,
     SITE,
     CREDENTIALS_FILE,
     SHEET_NAME,
-    SHEET_ID,
+    ALLEGRO_SHEET_NAME,
+    GSHEETS_DIFF_SYNC,
+    GSHEETS_KEY_COLUMN,
+    GSHEETS_MANUAL_COLUMNS,
+    GSHEETS_BATCH_ROWS,
+    GSHEETS_STAGING_SUFFIX,
+    METRICS_TRACE_MEMORY,
+    METRICS_JSON_FILE,
+    METRICS_PROMETHEUS_FILE,
     init_directories
 )
 
-init_directories()
\ No newline at end of file
+
+def __getattr__(name):
+    # Values kept in credentials/env are read on first use, so importing config has no side effects
+    if name == 'SHEET_ID':
+        return get_env('SHEET_ID')
+    raise AttributeError(f"module 'config' has no attribute '{name}'")
\ No newline at end of file
@@ -7,16 +7,99 @@ SITE = 'MAIN'
 # LIMIT for API requests
 SHOPER_LIMIT = 50
 
+# Number of pages downloaded concurrently from Shoper
+SHOPER_WORKERS = 4
+
+# Use the asyncio (aiohttp) client instead of the requests-based one
+SHOPER_ASYNC = False
+
+# Shoper rate limit - requests per second, burst size and retries on 429
+SHOPER_RATE = 2
+SHOPER_BURST = 10
+SHOPER_MAX_RETRIES = 5
+
+# Save every downloaded page to sheets/journal/, so an interrupted download resumes where it stopped
+SHOPER_JOURNAL = True
+# Journals older than this (seconds) are dropped instead of resumed - their pages may have shifted since
+SHOPER_JOURNAL_MAX_AGE = 6 * 60 * 60
+
+# Re-authenticate this many seconds before the Shoper token expires
+SHOPER_TOKEN_REFRESH_MARGIN = 300
+
+# Download only products changed since the last sync (full download when there's no snapshot yet)
+SHOPER_INCREMENTAL_SYNC = True
+# The next sync also fetches products edited this many seconds before the last download started,
+# covering the clock difference between the shop and this machine
+SHOPER_SYNC_OVERLAP = 600
+
+# Index downloaded products, categories and producers in SQLite (sheets/shoper_catalog.sqlite)
+# for code lookups and the report pre-selection, instead of reading whole snapshots
+CATALOG_INDEX = True
+
+# Also export downloaded Shoper data to .xlsx (the .jsonl snapshots are always written)
+EXPORT_EXCEL = False
+
+# Number of products formatted at once when building the dimensions report
+PROCESSING_CHUNK_SIZE = 5000
+
+# Processes parsing product descriptions (None - all cores) and descriptions sent to a process at once
+PARSING_WORKERS = None
+PARSING_CHUNK_SIZE = 200
+
+# Characters of the clean description kept in the report's 'Opis bez HTML' column (None - the whole text)
+DESCRIPTION_PREVIEW_LENGTH = None
+
+# Cache parsed descriptions between runs (sheets/description_cache.sqlite)
+DESCRIPTION_CACHE = True
+DESCRIPTION_CACHE_MAX_ENTRIES = 200000
+
+# Attribute groups holding product dimensions: group id -> (length attribute id, height attribute id).
+# Checked in this order, the first filled attribute wins. Use None when a group has no such attribute.
+DIMENSION_ATTRIBUTES = {
+    '552': ('1191', '1196'),
+    '553': ('1192', '1193'),
+    '555': ('1207', '1208'),
+    '556': ('1217', '1218'),
+    '560': ('1249', '1250'),
+    '561': (None, '1270'),
+    '562': ('1268', '1269'),
+}
+
+# Allegro export columns to load (None - all of them)
+ALLEGRO_EAN_COLUMN = 'EAN (GTIN)'
+ALLEGRO_OFFER_ID_COLUMN = 'ID oferty'
+ALLEGRO_COLUMNS = [ALLEGRO_OFFER_ID_COLUMN, 'Tytuł oferty', 'Sygnatura', ALLEGRO_EAN_COLUMN]
+
+# (group id, attribute id) of the product type and series
+PRODUCT_TYPE_ATTRIBUTE = ('550', '1370')
+PRODUCT_SERIES_ATTRIBUTE = ('550', '1160')
+
 # Google Sheets
 SHEET_NAME = 'Wymiary'
+ALLEGRO_SHEET_NAME = 'Allegro'
 CREDENTIALS_FILE = os.path.join('credentials', 'gsheets_credentials.json')
-SHEET_ID = os.getenv('SHEET_ID')
+# SHEET_ID is read from credentials/env on first use (see config/__init__.py)
+
+# Write only changed rows, matched by the key column. Manual columns are never overwritten.
+GSHEETS_DIFF_SYNC = True
+GSHEETS_KEY_COLUMN = 'ID produktu'
+GSHEETS_MANUAL_COLUMNS = ['Komentarz', 'Osoba']
+
+# Rows (or changed ranges) sent in one request, and the suffix of the tab full uploads are staged in
+GSHEETS_BATCH_ROWS = 5000
+GSHEETS_STAGING_SUFFIX = '_staging'
+
+# Run instrumentation: trace peak memory of every stage (slows processing down)
+# and export the metrics of each run to JSON / a Prometheus textfile (None - don't export)
+METRICS_TRACE_MEMORY = False
+METRICS_JSON_FILE = None
+METRICS_PROMETHEUS_FILE = None
 
 ROOT_DIR = Path(__file__).parent.parent
 SHEETS_DIR = ROOT_DIR / 'sheets'
 
 def init_directories():
-    """Initialize required directories if they don't exist"""
+    """Initialize required directories if they don't exist. Called by the entry points before a run."""
     try:
         SHEETS_DIR.mkdir(parents=True, exist_ok=True)
     except PermissionError:
@@ -1,6 +1,20 @@
-from dotenv import load_dotenv
 import os
 
+_loaded = False
+
 def load_environment():
+    """Load credentials/env into the environment (once - later calls do nothing)."""
+    global _loaded
+    if _loaded:
+        return
+
+    from dotenv import load_dotenv
     dotenv_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'credentials', 'env')
-    load_dotenv(dotenv_path)
\ No newline at end of file
+    load_dotenv(dotenv_path)
+    _loaded = True
+
+
+def get_env(name):
+    """Return an environment variable, loading credentials/env first."""
+    load_environment()
+    return os.getenv(name)
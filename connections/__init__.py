@@ -1,5 +1,18 @@
-from .shoper_connect import ShoperAPIClient
-from .gsheets_connect import GSheetsClient
-from .allegro_offers import Allegro
+import importlib
 
-print('API Connections loaded.')
+# Clients are imported on first use, so `import connections` doesn't load pandas, gspread or requests
+_LAZY_ATTRIBUTES = {
+    'ShoperAPIClient': '.shoper_connect',
+    'GSheetsClient': '.gsheets_connect',
+    'Allegro': '.allegro_offers',
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module 'connections' has no attribute '{name}'")
@@ -1,21 +1,122 @@
 import os
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
+import config
+from .metrics import metrics
+
+
+# Shoper report columns added to every matched Allegro offer
+ALLEGRO_PRODUCT_COLUMNS = [
+    'EAN',
+    'ID produktu',
+    'Nazwa',
+    'Wymiary atrybut',
+    'Wymiary opis',
+    'Link do edycji',
+    'Komentarz',
+    'Osoba'
+]
+
+
+def _read_export(file_path, columns):
+    """Parse a single Allegro export, keeping only the configured columns. EANs are read as text."""
+    usecols = (lambda column: column in columns) if columns else None
+    return pd.read_excel(file_path, usecols=usecols, dtype={config.ALLEGRO_EAN_COLUMN: str})
+
 
 class Allegro:
 
     def __init__(self):
-        self.all_filepath = os.path.join('sheets', 'allegro_exports')
-        self.final_df = self.load_and_get_all_dfs()
+        self.all_filepath = os.path.join(config.SHEETS_DIR, 'allegro_exports')
+        self.cache_dir = os.path.join(config.SHEETS_DIR, 'allegro_cache')
+        self.columns = config.ALLEGRO_COLUMNS
+        self.dfs = []
+        self._final_df = None
+
+    @property
+    def final_df(self):
+        """All exports combined - loaded on first use."""
+        if self._final_df is None:
+            with metrics.stage('allegro exports') as stage:
+                self._final_df = self.load_and_get_all_dfs()
+                stage['rows'] = len(self._final_df)
+        return self._final_df
 
-        print(self.final_df)
+    def _cache_path(self, file_path):
+        """Cache file of an export, keyed by its path, modification time, size and loaded columns."""
+        stat = os.stat(file_path)
+        path_key = hashlib.sha1(os.path.abspath(file_path).encode('utf-8')).hexdigest()[:16]
+        version_key = hashlib.sha1(f'{stat.st_mtime_ns}:{stat.st_size}:{self.columns}'.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f'{path_key}_{version_key}.pkl')
+
+    def _save_cache(self, cache_path, df):
+        path_key = os.path.basename(cache_path).split('_')[0]
+        for old_cache in os.listdir(self.cache_dir):
+            if old_cache.startswith(f'{path_key}_'):
+                os.remove(os.path.join(self.cache_dir, old_cache))
+        df.to_pickle(cache_path)
 
     def load_and_get_all_dfs(self):
-        self.dfs = []
+        """
+        Load every .xlsx export and combine them.
+        Parsed exports are cached, so only new or changed files are read -
+        in parallel, one process per file.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        files = sorted(
+            os.path.join(self.all_filepath, file)
+            for file in os.listdir(self.all_filepath)
+            if file.endswith('.xlsx')
+        )
+
+        cache_paths = {file_path: self._cache_path(file_path) for file_path in files}
+        to_parse = [file_path for file_path in files if not os.path.exists(cache_paths[file_path])]
+        print(f'Allegro exports: {len(files) - len(to_parse)} cached, {len(to_parse)} to parse.')
+
+        parsed = {}
+        if len(to_parse) > 1:
+            with ProcessPoolExecutor(max_workers=min(len(to_parse), os.cpu_count())) as executor:
+                parsed = dict(zip(to_parse, executor.map(_read_export, to_parse, [self.columns] * len(to_parse))))
+        elif to_parse:
+            parsed = {to_parse[0]: _read_export(to_parse[0], self.columns)}
+
+        for file_path, df in parsed.items():
+            self._save_cache(cache_paths[file_path], df)
+
+        self.dfs = [
+            parsed[file_path] if file_path in parsed else pd.read_pickle(cache_paths[file_path])
+            for file_path in files
+        ]
+
+        return pd.concat(self.dfs, ignore_index=True)
+
+    @staticmethod
+    def normalize_ean(eans):
+        """Normalise EANs for matching: digits only, without float artifacts and leading zeros."""
+        return (
+            eans.astype('string')
+            .str.strip()
+            .str.replace(r'\.0$', '', regex=True)
+            .str.replace(r'\D', '', regex=True)
+            .str.lstrip('0')
+        )
+
+    def find_offers_missing_dimensions(self, products):
+        """
+        Join Allegro offers with the formatted Shoper report (get_all_active_products_formatted)
+        on normalised EAN and return the offers of products that still lack dimensions.
+        The join is a hash join done by pandas, both sides are indexed once.
+        """
+        offers = self.final_df
+        offers = offers.assign(_ean=self.normalize_ean(offers[config.ALLEGRO_EAN_COLUMN]))
+        offers = offers[offers['_ean'].notna() & (offers['_ean'] != '')]
+
+        products = products[ALLEGRO_PRODUCT_COLUMNS].assign(_ean=self.normalize_ean(products['EAN']))
+        products = products[products['_ean'].notna() & (products['_ean'] != '')].drop_duplicates('_ean')
 
-        for file in os.listdir(self.all_filepath):
-            if file.endswith('.xlsx'):
-                file_path = os.path.join(self.all_filepath, file)
-                df = pd.read_excel(file_path)
-                self.dfs.append(df)
-        
-        return pd.concat(self.dfs, ignore_index=True)
\ No newline at end of file
+        missing = offers.merge(products, on='_ean', how='inner', suffixes=('', ' Shoper')).drop(columns='_ean')
+        # An offer listed twice in the exports would be two rows with the same key in the sheet
+        missing = missing.drop_duplicates(config.ALLEGRO_OFFER_ID_COLUMN)
+        print(f'{len(missing)} Allegro offers without dimensions found.')
+        return missing.reset_index(drop=True)
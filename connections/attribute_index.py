@@ -0,0 +1,101 @@
+import config
+
+
+class AttributeIndex:
+    """
+    Lookup index of the product attributes used by the report, compiled once from configuration.
+    Product attributes come from Shoper as {group_id: {attribute_id: value}};
+    the index keeps (group_id, attribute_id) pairs in priority order, so resolving
+    a product is only a few dict hits.
+    """
+
+    def __init__(self, dimension_attributes, type_attribute, series_attribute, attributes_metadata=None):
+        """
+        Args:
+            dimension_attributes (dict): group_id -> (length attribute_id, height attribute_id),
+                in priority order. Either attribute can be None.
+            type_attribute (tuple): (group_id, attribute_id) of the product type.
+            series_attribute (tuple): (group_id, attribute_id) of the product series.
+            attributes_metadata (iterable): Downloaded attributes (get_all_attributes) used to
+                check the configuration against the shop - optional.
+        """
+        groups = self._groups_from_metadata(attributes_metadata)
+
+        self.length = []
+        self.height = []
+        for group_id, (length_id, height_id) in dimension_attributes.items():
+            if length_id:
+                self.length.append(self._resolve(group_id, length_id, groups))
+            if height_id:
+                self.height.append(self._resolve(group_id, height_id, groups))
+
+        self.type_attribute = self._resolve(*type_attribute, groups)
+        self.series_attribute = self._resolve(*series_attribute, groups)
+
+    @classmethod
+    def from_config(cls, attributes_metadata=None):
+        return cls(
+            config.DIMENSION_ATTRIBUTES,
+            config.PRODUCT_TYPE_ATTRIBUTE,
+            config.PRODUCT_SERIES_ATTRIBUTE,
+            attributes_metadata
+        )
+
+    @staticmethod
+    def _groups_from_metadata(attributes_metadata):
+        if attributes_metadata is None:
+            return None
+        return {
+            str(attribute['attribute_id']): str(attribute['attribute_group_id'])
+            for attribute in attributes_metadata
+            if attribute.get('attribute_group_id') is not None
+        }
+
+    @staticmethod
+    def _resolve(group_id, attribute_id, groups):
+        """Return the (group_id, attribute_id) pair, moved to the group the shop reports, if any."""
+        group_id, attribute_id = str(group_id), str(attribute_id)
+        if groups is None:
+            return group_id, attribute_id
+
+        if attribute_id not in groups:
+            print(f'Attribute {attribute_id} from config doesn\'t exist in Shoper')
+        elif groups[attribute_id] != group_id:
+            print(f'Attribute {attribute_id} belongs to group {groups[attribute_id]}, not {group_id}')
+            group_id = groups[attribute_id]
+        return group_id, attribute_id
+
+    @staticmethod
+    def _first_value(attributes, pairs):
+        for group_id, attribute_id in pairs:
+            group = attributes.get(group_id)
+            if isinstance(group, dict) and group.get(attribute_id):
+                return group[attribute_id]
+        return ''
+
+    def get_value(self, attributes, pair):
+        """Return the attribute's value ('' when missing)."""
+        if not isinstance(attributes, dict):
+            return ''
+        group = attributes.get(pair[0])
+        if not isinstance(group, dict):
+            return ''
+        return group.get(pair[1], '')
+
+    def product_type(self, attributes):
+        return self.get_value(attributes, self.type_attribute)
+
+    def product_series(self, attributes):
+        return self.get_value(attributes, self.series_attribute)
+
+    def dimensions(self, attributes):
+        """Return 'length x height' from the first filled attributes, or '' when either is missing."""
+        if not isinstance(attributes, dict):
+            return ''
+
+        product_length = self._first_value(attributes, self.length)
+        product_height = self._first_value(attributes, self.height)
+
+        if product_length != '' and product_height != '':
+            return f"{product_length} x {product_height}"
+        return ''
@@ -0,0 +1,186 @@
+import json
+import os
+import re
+import sqlite3
+import config
+
+
+def stock_code(product):
+    """Return the product's stock code, falling back to its product code."""
+    stock = product.get('stock')
+    return str(stock.get('code') if isinstance(stock, dict) and stock.get('code') else product.get('code'))
+
+
+def _regexp(pattern, value):
+    """SQLite REGEXP: case-insensitive search like pandas' str.lower().str.contains(pattern)."""
+    return isinstance(value, str) and re.search(pattern, value.lower()) is not None
+
+
+class Catalog:
+    """
+    Queryable copy of the Shoper snapshots kept in SQLite.
+    Products are indexed by stock code and by attribute values, categories and producers by id,
+    so lookups and the report pre-selection don't load the whole catalogue into memory.
+    Every table remembers the snapshot it was built from - a stale table is rebuilt on demand.
+    Columns holding raw API values have no declared type, so values keep their JSON types.
+    """
+
+    TABLES = ('products', 'categories', 'producers')
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path (str): SQLite database path, defaults to SHEETS_DIR/shoper_catalog.sqlite.
+        """
+        self.path = path or os.path.join(config.SHEETS_DIR, 'shoper_catalog.sqlite')
+
+    def connect(self):
+        """Open a connection with the schema in place - one per operation, so threads don't share it."""
+        connection = sqlite3.connect(self.path, timeout=60)
+        connection.create_function('REGEXP', 2, _regexp, deterministic=True)
+        connection.executescript('''
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS products (
+                position INTEGER PRIMARY KEY,
+                product_id,
+                code,
+                stock_code,
+                name,
+                stock,
+                has_attributes INTEGER NOT NULL,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS products_stock_code ON products (stock_code);
+            CREATE INDEX IF NOT EXISTS products_product_id ON products (product_id);
+            CREATE TABLE IF NOT EXISTS product_attributes (
+                position INTEGER NOT NULL,
+                group_id TEXT NOT NULL,
+                attribute_id TEXT NOT NULL,
+                value
+            );
+            CREATE INDEX IF NOT EXISTS product_attributes_value ON product_attributes (group_id, attribute_id, value);
+            CREATE INDEX IF NOT EXISTS product_attributes_position ON product_attributes (position);
+            CREATE TABLE IF NOT EXISTS categories (category_id PRIMARY KEY, name, data TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS producers (producer_id PRIMARY KEY, name, data TEXT NOT NULL);
+        ''')
+        return connection
+
+    @staticmethod
+    def signature(store):
+        """Identify a snapshot version by its file's modification time and size."""
+        if not store.exists():
+            return None
+        stat = os.stat(store.path)
+        return f'{stat.st_mtime_ns}:{stat.st_size}'
+
+    def is_current(self, table, store):
+        connection = self.connect()
+        try:
+            row = connection.execute('SELECT value FROM meta WHERE key = ?', (table,)).fetchone()
+        finally:
+            connection.close()
+        return row is not None and row[0] == self.signature(store)
+
+    def ensure_current(self, table, store):
+        """Rebuild the table when its snapshot changed since the last build."""
+        if not self.is_current(table, store):
+            print(f'Indexing {table}...')
+            self.rebuild(table, store)
+
+    def rebuild(self, table, store):
+        """Replace the table with the records of a snapshot (SnapshotStore). Returns their number."""
+        rows = getattr(self, f'_{table}_rows')(store.iter_records())
+        connection = self.connect()
+        try:
+            with connection:
+                connection.execute(f'DELETE FROM {table}')
+                if table == 'products':
+                    connection.execute('DELETE FROM product_attributes')
+                    count = 0
+                    for product_row, attribute_rows in rows:
+                        connection.execute('INSERT INTO products VALUES (?, ?, ?, ?, ?, ?, ?, ?)', product_row)
+                        connection.executemany('INSERT INTO product_attributes VALUES (?, ?, ?, ?)', attribute_rows)
+                        count += 1
+                else:
+                    rows = list(rows)
+                    connection.executemany(f'INSERT OR REPLACE INTO {table} VALUES (?, ?, ?)', rows)
+                    count = len(rows)
+                connection.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', (table, self.signature(store)))
+        finally:
+            connection.close()
+        return count
+
+    @staticmethod
+    def _products_rows(products):
+        for position, product in enumerate(products):
+            attributes = product.get('attributes')
+            stock = product.get('stock')
+            translation = (product.get('translations') or {}).get('pl_PL') or {}
+            attribute_rows = [
+                (position, str(group_id), str(attribute_id), value)
+                for group_id, group in (attributes.items() if isinstance(attributes, dict) else [])
+                if isinstance(group, dict)
+                for attribute_id, value in group.items()
+                if value is None or isinstance(value, (str, int, float))
+            ]
+            yield (
+                position,
+                product.get('product_id'),
+                product.get('code'),
+                stock_code(product),
+                translation.get('name'),
+                stock.get('stock') if isinstance(stock, dict) else None,
+                int(isinstance(attributes, dict) and len(attributes) > 0),
+                json.dumps(product, ensure_ascii=False),
+            ), attribute_rows
+
+    @staticmethod
+    def _categories_rows(categories):
+        for category in categories:
+            translation = (category.get('translations') or {}).get('pl_PL') or {}
+            yield category.get('category_id'), translation.get('name'), json.dumps(category, ensure_ascii=False)
+
+    @staticmethod
+    def _producers_rows(producers):
+        for producer in producers:
+            yield producer.get('producer_id'), producer.get('name'), json.dumps(producer, ensure_ascii=False)
+
+    def products_by_codes(self, codes):
+        """Return {stock code: product} for the codes found in the catalogue."""
+        codes = [str(code) for code in codes]
+        found = {}
+        connection = self.connect()
+        try:
+            for start in range(0, len(codes), 500):
+                batch = codes[start:start + 500]
+                rows = connection.execute(
+                    f'SELECT stock_code, data FROM products WHERE stock_code IN ({",".join("?" * len(batch))}) ORDER BY position',
+                    batch
+                )
+                for code, data in rows:
+                    found[code] = json.loads(data)
+        finally:
+            connection.close()
+        return found
+
+    def report_candidates(self, type_attribute, type_patterns, excluded_code, excluded_name):
+        """
+        Yield products, in snapshot order, that can end up in the dimensions report:
+        with attributes and stock, a product type matching every pattern of `type_patterns`,
+        and neither `excluded_code` in the code nor `excluded_name` in the name.
+        Patterns are matched like pandas' str.lower().str.contains.
+        """
+        conditions = ' AND '.join(['t.value REGEXP ?'] * len(type_patterns)) or '1'
+        connection = self.connect()
+        try:
+            rows = connection.execute(f'''
+                SELECT p.data FROM products p
+                JOIN product_attributes t ON t.position = p.position AND t.group_id = ? AND t.attribute_id = ?
+                WHERE p.has_attributes AND p.stock IS NOT '0' AND {conditions}
+                    AND NOT p.code REGEXP ? AND NOT p.name REGEXP ?
+                ORDER BY p.position
+            ''', [*type_attribute, *type_patterns, re.escape(excluded_code), re.escape(excluded_name)])
+            for (data,) in rows:
+                yield json.loads(data)
+        finally:
+            connection.close()
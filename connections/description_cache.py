@@ -0,0 +1,112 @@
+import hashlib
+import os
+import sqlite3
+import time
+import config
+
+
+class DescriptionCache:
+    """
+    Persistent cache of parsed descriptions kept in SQLite.
+    Entries are keyed by a hash of the raw description HTML and hold the clean text
+    and the extracted dimensions. The cache clears itself when the parsing version
+    changes and keeps at most `max_entries` entries, evicting the least recently used ones.
+    """
+
+    def __init__(self, version, path=None, max_entries=None):
+        """
+        Args:
+            version (str): Version of the parsing logic - a different one invalidates the cache.
+            path (str): SQLite database path, defaults to SHEETS_DIR/description_cache.sqlite.
+            max_entries (int): Size limit, defaults to config.DESCRIPTION_CACHE_MAX_ENTRIES.
+        """
+        self.version = str(version)
+        self.path = path or os.path.join(config.SHEETS_DIR, 'description_cache.sqlite')
+        self.max_entries = max_entries or config.DESCRIPTION_CACHE_MAX_ENTRIES
+        self.connection = None
+        self.hits = 0
+        self.misses = 0
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def open(self):
+        self.connection = sqlite3.connect(self.path)
+        self.connection.executescript('''
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS descriptions (
+                hash TEXT PRIMARY KEY,
+                description TEXT NOT NULL,
+                dimensions TEXT NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS descriptions_last_used ON descriptions (last_used);
+        ''')
+
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if row is None or row[0] != self.version:
+            if row is not None:
+                print('Description parsing changed - clearing the description cache.')
+            self.connection.execute('DELETE FROM descriptions')
+            self.connection.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (self.version,))
+        self.connection.commit()
+
+    def close(self):
+        if self.connection is None:
+            return
+
+        self.evict()
+        self.connection.commit()
+        self.connection.close()
+        self.connection = None
+
+    @staticmethod
+    def key(product_description):
+        return hashlib.blake2b((product_description or '').encode('utf-8'), digest_size=16).hexdigest()
+
+    def get_many(self, keys):
+        """Return {hash: [dimensions, description]} for the keys found in the cache."""
+        found = {}
+        keys = list(set(keys))
+        now = time.time()
+
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            placeholders = ','.join('?' * len(batch))
+            rows = self.connection.execute(
+                f'SELECT hash, dimensions, description FROM descriptions WHERE hash IN ({placeholders})',
+                batch
+            )
+            for key, dimensions, description in rows:
+                found[key] = [dimensions, description]
+            self.connection.execute(
+                f'UPDATE descriptions SET last_used = ? WHERE hash IN ({placeholders})',
+                [now, *batch]
+            )
+
+        return found
+
+    def put_many(self, entries):
+        """Store {hash: [dimensions, description]} entries."""
+        now = time.time()
+        self.connection.executemany(
+            'INSERT OR REPLACE INTO descriptions VALUES (?, ?, ?, ?)',
+            [(key, description, dimensions, now) for key, (dimensions, description) in entries.items()]
+        )
+
+    def evict(self):
+        """Drop the least recently used entries above the size limit."""
+        count = self.connection.execute('SELECT COUNT(*) FROM descriptions').fetchone()[0]
+        if count > self.max_entries:
+            self.connection.execute(
+                'DELETE FROM descriptions WHERE hash IN '
+                '(SELECT hash FROM descriptions ORDER BY last_used LIMIT ?)',
+                (count - self.max_entries,)
+            )
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,101 @@
+import os
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+import config
+from .dimensions import find_dimensions, ENGINE_VERSION
+from .description_cache import DescriptionCache
+from .metrics import metrics
+
+
+class _TextExtractor(HTMLParser):
+    """
+    Streaming tag stripper collecting the same text as BeautifulSoup's get_text():
+    text nodes and CDATA, without comments, scripts, styles and templates.
+    """
+
+    SKIPPED_TAGS = {'script', 'style', 'template', 'rt', 'rp'}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.skipped_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIPPED_TAGS:
+            self.skipped_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIPPED_TAGS and self.skipped_depth:
+            self.skipped_depth -= 1
+
+    def handle_data(self, data):
+        if not self.skipped_depth:
+            self.parts.append(data)
+
+    def unknown_decl(self, data):
+        if data.upper().startswith('CDATA['):
+            self.handle_data(data[len('CDATA['):])
+
+
+# Bump whenever html_to_text changes - cached results depend on it
+PARSER_VERSION = 1
+
+
+def html_to_text(html):
+    """Strip HTML tags and return the text with whitespace collapsed to single spaces."""
+    if not html:
+        return ''
+
+    parser = _TextExtractor()
+    parser.feed(html)
+    parser.close()
+    return ' '.join(''.join(parser.parts).split())
+
+
+def parse_description(product_description):
+    """Return [dimensions, clean text] found in a product's HTML description."""
+    description = html_to_text(product_description)
+    return [find_dimensions(description), description]
+
+
+def create_cache():
+    """Return the description cache for the current parsing logic (a no-op context when disabled)."""
+    if not config.DESCRIPTION_CACHE:
+        return nullcontext()
+    return DescriptionCache(version=f'{PARSER_VERSION}.{ENGINE_VERSION}')
+
+
+def create_executor():
+    """Create the process pool used to parse descriptions on every core."""
+    return ProcessPoolExecutor(max_workers=config.PARSING_WORKERS or os.cpu_count())
+
+
+def parse_descriptions(descriptions, executor=None, cache=None):
+    """
+    Parse many descriptions, in chunks across the executor's processes when one is given.
+    Small batches are parsed in place, as shipping them to workers would cost more than parsing.
+    Descriptions found in the cache (DescriptionCache) are not parsed at all.
+    """
+    descriptions = list(descriptions)
+
+    if cache is not None:
+        keys = [cache.key(description) for description in descriptions]
+        with metrics.stage('description cache'):
+            results = cache.get_many(keys)
+        missing = {key: description for key, description in zip(keys, descriptions) if key not in results}
+        cache.hits += len(descriptions) - len(missing)
+        cache.misses += len(missing)
+        metrics.count('description_cache_hits', len(descriptions) - len(missing))
+        metrics.count('description_cache_misses', len(missing))
+
+        parsed = dict(zip(missing, parse_descriptions(missing.values(), executor)))
+        with metrics.stage('description cache'):
+            cache.put_many(parsed)
+        results.update(parsed)
+        return [results[key] for key in keys]
+
+    if executor is None or len(descriptions) < config.PARSING_CHUNK_SIZE * 2:
+        return [parse_description(description) for description in descriptions]
+
+    return list(executor.map(parse_description, descriptions, chunksize=config.PARSING_CHUNK_SIZE))
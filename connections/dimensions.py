@@ -0,0 +1,127 @@
+import re
+from dataclasses import dataclass
+
+# Bump whenever the extraction rules change - cached results depend on it
+ENGINE_VERSION = 1
+
+NUMBER = r'(\d+[.,]\d+|\d+)'
+UNIT = r'(cm|mm)?'
+SEPARATOR = r'(?:[xX×]|-)'
+
+# Two dimensions with an optional third one - a single scan finds both kinds
+NUMERIC_PATTERN = re.compile(
+    rf'{NUMBER}\s*{UNIT}\s*{SEPARATOR}\s*{NUMBER}\s*{UNIT}(?:\s*{SEPARATOR}\s*{NUMBER}\s*{UNIT})?'
+)
+LABELED_PATTERN = re.compile(
+    rf'(?:Długość|Dlugosc)[^:]*:\s*{NUMBER}\s*{UNIT}.*?(?:Szerokość|Szerokosc)[^:]*:\s*{NUMBER}\s*{UNIT}',
+    re.IGNORECASE
+)
+XY_PATTERN = re.compile(
+    rf'X-[^:]*:\s*{NUMBER}\s*{UNIT}.*?Y-[^:]*:\s*{NUMBER}\s*{UNIT}',
+    re.IGNORECASE
+)
+
+@dataclass(frozen=True)
+class DimensionMatch:
+    """Dimensions found in a text."""
+    kind: str
+    raw: tuple
+    values: tuple
+    units: tuple
+    start: int
+    end: int
+
+    def __str__(self):
+        return ' x '.join(self.raw)
+
+
+def _build_match(kind, match, count):
+    raw = tuple(match.group(2 * i + 1) for i in range(count))
+    units = tuple(match.group(2 * i + 2) for i in range(count))
+    values = tuple(value.replace(',', '.') for value in raw)
+    return DimensionMatch(kind, raw, values, units, match.start(), match.end())
+
+
+def _scan_numeric(text):
+    """
+    Return the first three-dimension and the first two-dimension re.Match in one pass.
+    Both come from the same pattern - the two-dimension one is its first two numbers.
+    """
+    first = None
+    position = 0
+
+    while match := NUMERIC_PATTERN.search(text, position):
+        if first is None:
+            first = match
+        if match.group(5) is not None:
+            return match, first
+        # A three-dimension match may start inside this one (e.g. '15x17.257.251x1x5')
+        position = match.start() + 1
+
+    return None, first
+
+
+def _scan_labeled(text, lowered):
+    if ('długość' in lowered or 'dlugosc' in lowered) and ('szerokość' in lowered or 'szerokosc' in lowered):
+        return LABELED_PATTERN.search(text)
+    return None
+
+
+def _scan_xy(text, lowered):
+    if 'x-' in lowered and 'y-' in lowered:
+        return XY_PATTERN.search(text)
+    return None
+
+
+def _best(text):
+    """Return (kind, re.Match, number of dimensions) of the best candidate or None."""
+    three, two = _scan_numeric(text)
+    if three:
+        return 'three', three, 3
+
+    # Labeled patterns need their keywords - skip the regex when they're missing
+    lowered = text.lower()
+    labeled = _scan_labeled(text, lowered)
+    if labeled:
+        return 'labeled', labeled, 2
+    xy = _scan_xy(text, lowered)
+    if xy:
+        return 'xy', xy, 2
+    if two:
+        return 'two', two, 2
+    return None
+
+
+def extract_all(text):
+    """Return the first match of every kind found in the text, ordered by priority."""
+    if not text:
+        return []
+
+    lowered = text.lower()
+    three, two = _scan_numeric(text)
+    candidates = [
+        ('three', three, 3),
+        ('labeled', _scan_labeled(text, lowered), 2),
+        ('xy', _scan_xy(text, lowered), 2),
+        ('two', two, 2),
+    ]
+
+    return [_build_match(kind, match, count) for kind, match, count in candidates if match]
+
+
+def extract(text):
+    """Return the best DimensionMatch found in the text or None."""
+    best = _best(text) if text else None
+    return _build_match(*best) if best else None
+
+
+def find_dimensions(text):
+    """Return dimensions found in the text formatted as 'a x b [x c]' or an empty string."""
+    best = _best(text) if text else None
+    if not best:
+        return ''
+
+    _, match, count = best
+    if count == 3:
+        return f'{match.group(1)} x {match.group(3)} x {match.group(5)}'
+    return f'{match.group(1)} x {match.group(3)}'
@@ -1,34 +1,46 @@
 import gspread
 import pandas as pd
 import os
-from config import SHEETS_DIR
+from config import SHEETS_DIR, GSHEETS_DIFF_SYNC, GSHEETS_KEY_COLUMN, GSHEETS_MANUAL_COLUMNS, GSHEETS_BATCH_ROWS, GSHEETS_STAGING_SUFFIX
 import time
-from gspread.exceptions import APIError
+import json
+import hashlib
+from gspread.exceptions import APIError, WorksheetNotFound
+from gspread.utils import rowcol_to_a1, ValueRenderOption
+from .metrics import metrics
 
 class GSheetsClient:
 
-    def __init__(self, credentials, sheet_id, sheet_name):
+    def __init__(self, credentials, sheet_id, sheet_name, key_column=GSHEETS_KEY_COLUMN):
         """
         Initialize the GSheetsClient with credentials and sheet ID.
         Args:
             credentials (str): Path to the service account JSON credentials file.
             sheet_id (str): Name of the environment variable storing the sheet ID.
             sheet_name (str): Name of the specific sheet.
+            key_column (str): Column identifying rows when syncing changes.
         """
 
         self.credentials_path = credentials
         self.sheet_id = sheet_id
         self.sheet_name = sheet_name
+        self.key_column = key_column
         self.gc = None
         self.sheet = None
         self.worksheet = None
+        self.max_retries = 3
+        self.delay = 5
 
     def connect(self):
-        """Authenticate with Google Sheets."""
+        """Authenticate with Google Sheets. The worksheet is created when it doesn't exist yet."""
         try:
             self.gc = gspread.service_account(filename=self.credentials_path)
             self.sheet = self.gc.open_by_key(self.sheet_id)
-            self.worksheet = self.sheet.worksheet(self.sheet_name)
+            try:
+                self.worksheet = self.sheet.worksheet(self.sheet_name)
+            except WorksheetNotFound:
+                print(f"Creating the '{self.sheet_name}' worksheet.")
+                self.worksheet = self.sheet.add_worksheet(title=self.sheet_name, rows=1000, cols=26)
             print("Google Authentication successful.")
         except Exception as e:
             print(f"Failed to connect to Google Sheets: {str(e)}")
@@ -58,37 +70,242 @@ class GSheetsClient:
     def save_data(self, df, max_retries=3, delay=5):
         """
         Save DataFrame to Google Sheets.
+        With GSHEETS_DIFF_SYNC only changed rows are written (see sync_data),
+        otherwise the report is uploaded to a staging tab and copied in (see rewrite_data).
+        Every request is retried up to `max_retries` times with exponential backoff starting at `delay` seconds.
         """
-        attempt = 0
-        while attempt < max_retries:
-            try:
-                print('Transforming data...')
-                all_values = self.transform_data(df)
-                print('Cleaning the worksheet...')
-                self.worksheet.clear()
-                print('Saving to Google Sheets...')
-                self.worksheet.update(all_values)
-                print("Successfully saved to Google Sheets!")
-                return True
-                
-            except APIError as e:
-                attempt += 1
-                if attempt == max_retries:
-                    print(f"Failed to save after {max_retries} attempts. Error: {str(e)}")
-                    return False
+        self.max_retries = max_retries
+        self.delay = delay
+
+        try:
+            with metrics.stage('gsheets save') as stage:
+                if GSHEETS_DIFF_SYNC:
+                    print('Syncing with Google Sheets...')
+                    self.sync_data(df)
                 else:
-                    print(f"Attempt {attempt} failed. Retrying in {delay} seconds...")
-                    time.sleep(delay)
-            except Exception as e:
-                print(f"Unexpected error occurred: {str(e)}")
-                return False
+                    print('Transforming data...')
+                    self.rewrite_data(self.transform_data(df))
+                stage['rows'] = len(df)
+            print("Successfully saved to Google Sheets!")
+            return True
+
+        except APIError as e:
+            print(f"Failed to save after {max_retries} attempts. Error: {str(e)}")
+            return False
+        except Exception as e:
+            print(f"Unexpected error occurred: {str(e)}")
+            return False
+
+    def _with_backoff(self, function, *args, **kwargs):
+        """Call a Sheets API function, retrying APIErrors with exponential backoff."""
+        for attempt in range(1, self.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            except APIError:
+                metrics.count('gsheets_errors')
+                if attempt == self.max_retries:
+                    raise
+                wait = self.delay * 2 ** (attempt - 1)
+                metrics.count('gsheets_retries')
+                metrics.count('gsheets_backoff_seconds', wait)
+                print(f"Attempt {attempt} failed. Retrying in {wait} seconds...")
+                time.sleep(wait)
+            finally:
+                metrics.observe('gsheets_request_seconds', time.perf_counter() - start)
+                metrics.count('gsheets_requests')
+
+    def rewrite_data(self, all_values):
+        """
+        Replace the worksheet with `all_values`.
+        Rows are uploaded in GSHEETS_BATCH_ROWS chunks to a staging tab, whose values then replace
+        the worksheet's in a single atomic batch update, so readers never see a half-filled sheet.
+        Uploaded chunks are checkpointed - a failed upload of the same data resumes from the last chunk.
+        Returns the number of written cells.
+        """
+        staging_name = f'{self.sheet_name}{GSHEETS_STAGING_SUFFIX}'
+        checkpoint_path = os.path.join(SHEETS_DIR, 'gsheets_upload_checkpoint.json')
+        data_hash = hashlib.sha1(json.dumps(all_values, default=str).encode('utf-8')).hexdigest()
+        columns = max(len(row) for row in all_values)
+
+        checkpoint = {}
+        if os.path.exists(checkpoint_path):
+            with open(checkpoint_path, encoding='utf-8') as f:
+                checkpoint = json.load(f)
+
+        staging = self._find_worksheet(staging_name)
+        if staging and checkpoint.get('hash') == data_hash and checkpoint.get('sheet') == staging_name:
+            start = checkpoint['rows_written']
+            print(f'Resuming upload from row {start + 1}...')
+        else:
+            if staging:
+                self._with_backoff(self.sheet.del_worksheet, staging)
+            staging = self._with_backoff(self.sheet.add_worksheet, staging_name, rows=len(all_values), cols=columns)
+            start = 0
+
+        for start in range(start, len(all_values), GSHEETS_BATCH_ROWS):
+            chunk = all_values[start:start + GSHEETS_BATCH_ROWS]
+            self._with_backoff(staging.update, chunk, f'A{start + 1}')
+            with open(checkpoint_path, 'w', encoding='utf-8') as f:
+                json.dump({'sheet': staging_name, 'hash': data_hash, 'rows_written': start + len(chunk)}, f)
+            print(f'Saved rows: {start + len(chunk)}/{len(all_values)}')
+
+        self._copy_from_staging(staging, len(all_values), columns)
+        os.remove(checkpoint_path)
+
+        cells = sum(len(row) for row in all_values)
+        metrics.count('gsheets_cells_written', cells)
+        print(f'{cells} cells written.')
+        return cells
+
+    def _find_worksheet(self, title):
+        try:
+            return self.sheet.worksheet(title)
+        except WorksheetNotFound:
+            return None
+
+    def _copy_from_staging(self, staging, rows, columns):
+        """
+        Replace the worksheet's values with the staging tab's and delete the tab, in one atomic request.
+        The worksheet itself stays (same sheetId), so formulas, filters, formatting,
+        protections and links pointing at it keep working.
+        """
+        grid = {'startRowIndex': 0, 'endRowIndex': rows, 'startColumnIndex': 0, 'endColumnIndex': columns}
+        self._with_backoff(self.sheet.batch_update, {'requests': [
+            {'updateSheetProperties': {
+                'properties': {'sheetId': self.worksheet.id, 'gridProperties': {'rowCount': rows, 'columnCount': columns}},
+                'fields': 'gridProperties.rowCount,gridProperties.columnCount'
+            }},
+            {'updateCells': {'range': {'sheetId': self.worksheet.id}, 'fields': 'userEnteredValue'}},
+            {'copyPaste': {
+                'source': {'sheetId': staging.id, **grid},
+                'destination': {'sheetId': self.worksheet.id, **grid},
+                'pasteType': 'PASTE_VALUES'
+            }},
+            {'deleteSheet': {'sheetId': staging.id}},
+        ]})
+
+    def sync_data(self, df, key=None):
+        """
+        Update the worksheet to match the DataFrame, writing only what changed.
+        Rows are matched by the `key` column: changed cells are sent as batched range updates,
+        removed rows are deleted and new rows appended. Manual columns (GSHEETS_MANUAL_COLUMNS)
+        of existing rows are left untouched. Keys and cells are compared in a normalised form (see _normalize),
+        so sheets written as text by older versions match the typed values. Returns the number of written cells.
+        """
+        new_values = self.transform_data(df)
+        header, new_rows = new_values[0], new_values[1:]
+        key_index = header.index(key or self.key_column)
+
+        current_values = self._with_backoff(self.worksheet.get_all_values, value_render_option=ValueRenderOption.unformatted)
+        if not current_values or current_values[0][:len(header)] != header:
+            print('Worksheet layout differs from the report. Rewriting the whole worksheet...')
+            return self.rewrite_data(new_values)
+
+        current_rows = {}
+        removed = []
+        for row_number, row in enumerate(current_values[1:], start=2):
+            row = row[:len(header)] + [''] * (len(header) - len(row))
+            if all(cell == '' for cell in row):
+                continue
+            row_key = self._normalize(row[key_index])
+            if row_key in current_rows or row_key == '':
+                removed.append(row_number)
+            else:
+                current_rows[row_key] = (row_number, row)
+
+        new_keys = set()
+        updates = []
+        inserted = []
+        synced_columns = [index for index, column in enumerate(header) if column not in GSHEETS_MANUAL_COLUMNS]
+
+        for new_row in new_rows:
+            row_key = self._normalize(new_row[key_index])
+            new_keys.add(row_key)
+            if row_key not in current_rows:
+                inserted.append(new_row)
+                continue
+
+            row_number, current_row = current_rows[row_key]
+            changed = [index for index in synced_columns if self._normalize(current_row[index]) != self._normalize(new_row[index])]
+            for first, last in self._segments(changed):
+                updates.append({
+                    'range': f'{rowcol_to_a1(row_number, first + 1)}:{rowcol_to_a1(row_number, last + 1)}',
+                    'values': [new_row[first:last + 1]]
+                })
+
+        removed.extend(row_number for row_key, (row_number, _) in current_rows.items() if row_key not in new_keys)
+
+        cells = sum(len(update['values'][0]) for update in updates)
+        for start in range(0, len(updates), GSHEETS_BATCH_ROWS):
+            self._with_backoff(self.worksheet.batch_update, updates[start:start + GSHEETS_BATCH_ROWS])
+
+        if removed:
+            # Delete from the bottom, so row numbers of the remaining blocks don't move
+            requests = [
+                {'deleteDimension': {'range': {
+                    'sheetId': self.worksheet.id,
+                    'dimension': 'ROWS',
+                    'startIndex': first - 1,
+                    'endIndex': last
+                }}}
+                for first, last in reversed(self._segments(sorted(removed)))
+            ]
+            self._with_backoff(self.sheet.batch_update, {'requests': requests})
+
+        for start in range(0, len(inserted), GSHEETS_BATCH_ROWS):
+            self._with_backoff(self.worksheet.append_rows, inserted[start:start + GSHEETS_BATCH_ROWS], table_range='A1')
+        cells += len(inserted) * len(header)
+        metrics.count('gsheets_cells_written', cells)
+
+        print(f'{len(inserted)} rows inserted, {len(updates)} ranges changed, {len(removed)} rows removed.')
+        print(f'{cells} cells written.')
+        return cells
+
+    @staticmethod
+    def _normalize(value):
+        """Comparable form of a cell value: 11, 11.0 and '11' are the same cell."""
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        return str(value)
+
+    @staticmethod
+    def _segments(indexes):
+        """Group sorted indexes into (first, last) runs of consecutive values."""
+        segments = []
+        for index in indexes:
+            if segments and segments[-1][1] == index - 1:
+                segments[-1][1] = index
+            else:
+                segments.append([index, index])
+        return [tuple(segment) for segment in segments]
 
     def transform_data(self, df):
         """
         Transform DataFrame to match Google Sheets format.
+        The value grid is built column by column without copying the frame: numbers and booleans
+        stay typed, dates become 'YYYY-MM-DD[ HH:MM:SS]' strings and missing values empty cells.
         """
-        df_string = df.astype(str)
-        header = df_string.columns.values.tolist()
-        data = df_string.values.tolist()
-        
-        return [header] + data
+        header = [str(column) for column in df.columns]
+        columns = [self._serialize_column(df[column]) for column in df.columns]
+
+        return [header] + [list(row) for row in zip(*columns)]
+
+    @staticmethod
+    def _serialize_column(series):
+        """Return a column as a list of JSON-serialisable cell values."""
+        missing = series.isna().to_numpy()
+
+        if pd.api.types.is_bool_dtype(series.dtype):
+            values = series.to_numpy().tolist()
+        elif pd.api.types.is_numeric_dtype(series.dtype):
+            values = series.to_numpy(dtype=object, na_value=None).tolist() if missing.any() else series.to_numpy().tolist()
+        elif pd.api.types.is_datetime64_any_dtype(series.dtype):
+            with_time = (series.dropna().dt.normalize() != series.dropna()).any()
+            values = series.dt.strftime('%Y-%m-%d %H:%M:%S' if with_time else '%Y-%m-%d').tolist()
+        else:
+            values = [value if isinstance(value, str) else str(value) for value in series.tolist()]
+
+        if missing.any():
+            values = ['' if is_missing else value for value, is_missing in zip(values, missing)]
+        return values
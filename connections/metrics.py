@@ -0,0 +1,218 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+import config
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class Metrics:
+    """
+    Process-wide run instrumentation.
+    Counters and latency histograms (optionally labelled) are updated by the clients,
+    stages time whole steps of a run - the rows they processed and, with METRICS_TRACE_MEMORY,
+    their peak traced memory. Stages with the same name add up.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.started = time.perf_counter()
+            self.counters = {}
+            self.histograms = {}
+            self.stages = {}
+            self.open_stages = []
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def count(self, name, value=1, **labels):
+        """Add `value` to a counter."""
+        key = self._key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        """Record a latency (seconds) in a histogram."""
+        key = self._key(name, labels)
+        with self.lock:
+            histogram = self.histograms.setdefault(key, {'buckets': [0] * len(LATENCY_BUCKETS), 'sum': 0.0, 'count': 0})
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if value <= bound:
+                    histogram['buckets'][index] += 1
+            histogram['sum'] += value
+            histogram['count'] += 1
+
+    def _fold_peak(self):
+        """Pass the traced peak so far to every open stage and start measuring a new one."""
+        peak = tracemalloc.get_traced_memory()[1]
+        for stage in self.open_stages:
+            stage['peak'] = max(stage['peak'], peak)
+        tracemalloc.reset_peak()
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Time a step of the run. Yields a dict - set its 'rows' to the number of processed rows.
+        Stages can be nested, every one gets the peak traced memory of the time it was open.
+        """
+        trace = config.METRICS_TRACE_MEMORY
+        current = {'rows': 0, 'peak': 0}
+
+        if trace:
+            with self.lock:
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                self._fold_peak()
+                self.open_stages.append(current)
+
+        start = time.perf_counter()
+        try:
+            yield current
+        finally:
+            seconds = time.perf_counter() - start
+            with self.lock:
+                if trace:
+                    self._fold_peak()
+                    self.open_stages.remove(current)
+                    if not self.open_stages:
+                        tracemalloc.stop()
+
+                stage = self.stages.setdefault(name, {'calls': 0, 'seconds': 0.0, 'rows': 0, 'peak_bytes': 0})
+                stage['calls'] += 1
+                stage['seconds'] += seconds
+                stage['rows'] += current['rows']
+                stage['peak_bytes'] = max(stage['peak_bytes'], current['peak'])
+
+    @staticmethod
+    def _peak_rss():
+        """Peak resident memory of the process in bytes, None where it can't be read."""
+        if resource is None:
+            return None
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == 'Darwin' else peak * 1024
+
+    def snapshot(self):
+        """Return everything recorded so far as a JSON-serialisable dict."""
+        with self.lock:
+            def labelled(items, value):
+                return [{'name': name, 'labels': dict(labels), **value(data)} for (name, labels), data in sorted(items.items())]
+
+            return {
+                'seconds': round(time.perf_counter() - self.started, 3),
+                'peak_rss_bytes': self._peak_rss(),
+                'stages': {
+                    name: {
+                        **stage,
+                        'seconds': round(stage['seconds'], 3),
+                        'rows_per_second': round(stage['rows'] / stage['seconds'], 1) if stage['rows'] and stage['seconds'] else None,
+                    }
+                    for name, stage in self.stages.items()
+                },
+                'counters': labelled(self.counters, lambda value: {'value': round(value, 3)}),
+                'histograms': labelled(self.histograms, lambda histogram: {
+                    'buckets': dict(zip(map(str, LATENCY_BUCKETS), histogram['buckets'])),
+                    'sum': round(histogram['sum'], 3),
+                    'count': histogram['count'],
+                }),
+            }
+
+    def print_summary(self):
+        """Print where the run spent its time."""
+        data = self.snapshot()
+        print(f"Run summary ({data['seconds']:.1f}s):")
+        for name, stage in sorted(data['stages'].items(), key=lambda item: -item[1]['seconds']):
+            details = [f"{stage['seconds']:.1f}s"]
+            if stage['calls'] > 1:
+                details.append(f"{stage['calls']} calls")
+            if stage['rows']:
+                details.append(f"{stage['rows']} rows ({stage['rows_per_second']}/s)")
+            if stage['peak_bytes']:
+                details.append(f"peak {stage['peak_bytes'] / 2 ** 20:.1f} MB")
+            print(f"  {name}: {', '.join(details)}")
+
+        for counter in data['counters']:
+            labels = ', '.join(f'{key}={value}' for key, value in counter['labels'].items())
+            print(f"  {counter['name']}{f' [{labels}]' if labels else ''}: {counter['value']}")
+
+        for histogram in data['histograms']:
+            if histogram['count']:
+                labels = ', '.join(f'{key}={value}' for key, value in histogram['labels'].items())
+                average = histogram['sum'] / histogram['count']
+                print(f"  {histogram['name']}{f' [{labels}]' if labels else ''}: {histogram['count']} x {average * 1000:.0f} ms avg")
+
+        if data['peak_rss_bytes']:
+            print(f"  Peak memory: {data['peak_rss_bytes'] / 2 ** 20:.0f} MB")
+
+    def to_prometheus(self):
+        """Return the metrics in the Prometheus text exposition format (for the node_exporter textfile collector)."""
+        data = self.snapshot()
+        prefix = 'dimension_generator_'
+        lines = []
+
+        def labels_text(labels):
+            return '{' + ','.join(f'{key}="{value}"' for key, value in labels.items()) + '}' if labels else ''
+
+        def declare(name, metric_type):
+            # Every metric is declared once, before its first labelled sample
+            if f'# TYPE {name} {metric_type}' not in lines:
+                lines.append(f'# TYPE {name} {metric_type}')
+
+        for counter in data['counters']:
+            name = f"{prefix}{counter['name']}"
+            declare(name, 'counter')
+            lines.append(f"{name}{labels_text(counter['labels'])} {counter['value']}")
+
+        for histogram in data['histograms']:
+            name = f"{prefix}{histogram['name']}"
+            declare(name, 'histogram')
+            for bound, value in histogram['buckets'].items():
+                lines.append(f"{name}_bucket{labels_text({**histogram['labels'], 'le': bound})} {value}")
+            lines.append(f"{name}_bucket{labels_text({**histogram['labels'], 'le': '+Inf'})} {histogram['count']}")
+            lines.append(f"{name}_sum{labels_text(histogram['labels'])} {histogram['sum']}")
+            lines.append(f"{name}_count{labels_text(histogram['labels'])} {histogram['count']}")
+
+        for field in ('seconds', 'rows', 'peak_bytes'):
+            name = f'{prefix}stage_{field}'
+            lines.append(f'# TYPE {name} gauge')
+            lines += [f'{name}{labels_text({"stage": stage_name})} {stage[field]}' for stage_name, stage in data['stages'].items()]
+
+        if data['peak_rss_bytes']:
+            lines += [f'# TYPE {prefix}peak_rss_bytes gauge', f"{prefix}peak_rss_bytes {data['peak_rss_bytes']}"]
+        return '\n'.join(lines) + '\n'
+
+    def export(self):
+        """Write the configured exports (METRICS_JSON_FILE, METRICS_PROMETHEUS_FILE)."""
+        if config.METRICS_JSON_FILE:
+            with open(config.METRICS_JSON_FILE, 'w', encoding='utf-8') as f:
+                json.dump(self.snapshot(), f, indent=2)
+
+        if config.METRICS_PROMETHEUS_FILE:
+            # Written next to the target and renamed, so the collector never reads half a file
+            temporary_path = f'{config.METRICS_PROMETHEUS_FILE}.tmp'
+            with open(temporary_path, 'w', encoding='utf-8') as f:
+                f.write(self.to_prometheus())
+            os.replace(temporary_path, config.METRICS_PROMETHEUS_FILE)
+
+    def finish_run(self):
+        """Print the summary, write the exports and start counting a new run."""
+        self.print_summary()
+        self.export()
+        self.reset()
+
+
+metrics = Metrics()
@@ -0,0 +1,83 @@
+import json
+import os
+import shutil
+import time
+import config
+
+
+class PageJournal:
+    """
+    On-disk journal of one paginated crawl (SHEETS_DIR/journal/<endpoint>/), one file per downloaded page.
+    A crawl interrupted by an error leaves its pages behind; the next crawl of the same
+    resource with the same parameters downloads only the missing pages and reads the rest
+    from the journal. A crawl is the same when the page size, the filters and the total
+    count reported by the shop didn't change and the journal isn't older than SHOPER_JOURNAL_MAX_AGE -
+    otherwise pages could have shifted and the journal is dropped.
+    `started` is when the crawl began: journaled pages were downloaded after it, but possibly long before they are read.
+    """
+
+    def __init__(self, endpoint, params=None):
+        self.endpoint = endpoint
+        self.path = os.path.join(config.SHEETS_DIR, 'journal', endpoint)
+        self.meta_path = os.path.join(self.path, 'crawl.json')
+        self.crawl = {'params': params or {}, 'limit': config.SHOPER_LIMIT}
+        self.started = None
+
+    def load_meta(self):
+        if not os.path.exists(self.meta_path):
+            return {}
+        with open(self.meta_path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def resumable_since(self):
+        """Start time of the journaled crawl a crawl starting now could resume, None when there's none."""
+        started = self.load_meta().get('started')
+        if started is None or time.time() - started > config.SHOPER_JOURNAL_MAX_AGE:
+            return None
+        return started
+
+    def start(self, first_page):
+        """Begin or resume the crawl whose first page is given. Returns the numbers of pages already journaled."""
+        crawl = {**self.crawl, 'count': first_page.get('count'), 'pages': int(first_page['pages'])}
+
+        meta = self.load_meta()
+        started = self.resumable_since()
+        meta.pop('started', None)
+
+        if meta != crawl or started is None:
+            self.clear()
+            os.makedirs(self.path, exist_ok=True)
+            self.started = time.time()
+            with open(self.meta_path, 'w', encoding='utf-8') as f:
+                json.dump({**crawl, 'started': self.started}, f)
+            return set()
+
+        self.started = started
+        pages = self.pages()
+        if pages:
+            print(f'Resuming {self.endpoint}: {len(pages)}/{crawl["pages"]} pages already downloaded.')
+        return pages
+
+    def _page_path(self, page):
+        return os.path.join(self.path, f'page_{page:06d}.json')
+
+    def pages(self):
+        return {
+            int(file[len('page_'):-len('.json')])
+            for file in os.listdir(self.path)
+            if file.startswith('page_') and file.endswith('.json')
+        }
+
+    def write(self, page, records):
+        """Save a downloaded page. The file appears complete or not at all."""
+        tmp_path = f'{self._page_path(page)}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(records, f, ensure_ascii=False)
+        os.replace(tmp_path, self._page_path(page))
+
+    def read(self, page):
+        with open(self._page_path(page), encoding='utf-8') as f:
+            return json.load(f)
+
+    def clear(self):
+        shutil.rmtree(self.path, ignore_errors=True)
@@ -0,0 +1,56 @@
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+
+def run_tasks(tasks, max_workers=None):
+    """
+    Run independent tasks in parallel, respecting dependencies between them.
+    Args:
+        tasks (dict): name -> (callable, list of names of tasks it depends on).
+        max_workers (int): Tasks run at once, defaults to all of them.
+    A failed task doesn't stop the others - only tasks depending on it are skipped.
+    Returns a dict name -> {'status': 'ok' | 'failed' | 'skipped', 'seconds': float, 'error': str | None}.
+    """
+    results = {}
+    waiting = dict(tasks)
+    running = {}
+
+    def run(name, function):
+        start = time.perf_counter()
+        try:
+            function()
+            return {'status': 'ok', 'seconds': time.perf_counter() - start, 'error': None}
+        except Exception as e:
+            traceback.print_exc()
+            return {'status': 'failed', 'seconds': time.perf_counter() - start, 'error': str(e)}
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(tasks) or 1) as executor:
+        while waiting or running:
+            for name, (function, dependencies) in list(waiting.items()):
+                if any(results.get(dependency, {}).get('status') in ('failed', 'skipped') for dependency in dependencies):
+                    results[name] = {'status': 'skipped', 'seconds': 0.0, 'error': 'dependency failed'}
+                    del waiting[name]
+                elif all(results.get(dependency, {}).get('status') == 'ok' for dependency in dependencies):
+                    running[executor.submit(run, name, function)] = name
+                    del waiting[name]
+
+            if not running:
+                # Left tasks wait for unknown tasks - nothing will ever unblock them
+                for name in waiting:
+                    results[name] = {'status': 'skipped', 'seconds': 0.0, 'error': 'unknown dependency'}
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[running.pop(future)] = future.result()
+
+    return results
+
+
+def print_timings(results):
+    """Print a per-task timing breakdown."""
+    print('Task timings:')
+    for name, result in sorted(results.items(), key=lambda item: -item[1]['seconds']):
+        error = f" ({result['error']})" if result['error'] else ''
+        print(f"  {name}: {result['status']}, {result['seconds']:.1f}s{error}")
@@ -0,0 +1,136 @@
+import asyncio
+import random
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Client-wide token bucket shared by every request sent to Shoper.
+    The bucket starts from the configured rate/burst and adapts itself to
+    the budget reported by the shop (X-Shop-Api-* headers and 429 responses):
+    the rate drops once per 429 pause and climbs back with every successful request.
+    """
+
+    def __init__(self, rate, capacity, max_retries=5, backoff_base=1, backoff_max=60, recovery=0.02):
+        """
+        Args:
+            rate (float): Requests per second the bucket refills with.
+            capacity (int): Maximum burst of requests.
+            max_retries (int): How many times a throttled request is retried.
+            backoff_base (float): Base delay (seconds) of the exponential backoff.
+            backoff_max (float): Upper bound of a single backoff delay.
+            recovery (float): Share of the configured rate regained per successful request.
+        """
+        self.rate = float(rate)
+        self.max_rate = self.rate
+        self.min_rate = self.rate / 4
+        self.recovery = recovery
+        self.capacity = int(capacity)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+        self.requests = 0
+        self.throttled = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.backoff_time = 0.0
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _try_acquire(self):
+        """Take a token when allowed. Returns 0 on success, otherwise seconds to wait."""
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now >= self.paused_until and self.tokens >= 1:
+                self.tokens -= 1
+                self.requests += 1
+                return 0
+            return max(self.paused_until - now, (1 - self.tokens) / self.rate)
+
+    def _record_wait(self, waited):
+        if waited:
+            with self.lock:
+                self.waits += 1
+                self.wait_time += waited
+        return waited
+
+    def acquire(self):
+        """Block until the bucket allows sending another request. Returns the seconds waited."""
+        waited = 0.0
+        while delay := self._try_acquire():
+            time.sleep(delay)
+            waited += delay
+        return self._record_wait(waited)
+
+    async def acquire_async(self):
+        """Wait (without blocking the event loop) until the bucket allows sending another request. Returns the seconds waited."""
+        waited = 0.0
+        while delay := self._try_acquire():
+            await asyncio.sleep(delay)
+            waited += delay
+        return self._record_wait(waited)
+
+    def update_from_headers(self, headers):
+        """Learn the shop's budget from the X-Shop-Api-Limit/X-Shop-Api-Calls headers."""
+        limit = headers.get('X-Shop-Api-Limit')
+        calls = headers.get('X-Shop-Api-Calls')
+
+        with self.lock:
+            if limit and limit.isdigit():
+                self.capacity = int(limit)
+            if calls and calls.isdigit():
+                # Keep one spare slot, so we stay just under the limit
+                self.tokens = min(self.tokens, max(0, self.capacity - int(calls) - 1))
+
+    def record_success(self):
+        """Register a request that wasn't throttled, raising a lowered rate back towards the configured one."""
+        with self.lock:
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate * self.recovery)
+
+    def throttle(self, attempt, retry_after=None):
+        """
+        Register a 429 response. Pauses the whole bucket for a jittered
+        exponential backoff (never shorter than Retry-After) and lowers the rate -
+        once per pause, however many workers were throttled during it.
+        Returns the delay applied.
+        """
+        delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+        delay = delay * random.uniform(0.5, 1)
+        if retry_after:
+            delay = max(delay, float(retry_after))
+
+        with self.lock:
+            now = time.monotonic()
+            if now >= self.paused_until:
+                self.rate = max(self.min_rate, self.rate * 0.8)
+            self.tokens = 0
+            self.updated = now
+            self.paused_until = max(self.paused_until, now + delay)
+            self.throttled += 1
+            self.backoff_time += delay
+
+        return delay
+
+    def stats(self):
+        """Return counters describing how much the limiter held requests back."""
+        with self.lock:
+            return {
+                'requests': self.requests,
+                'throttled': self.throttled,
+                'waits': self.waits,
+                'wait_time': round(self.wait_time, 2),
+                'backoff_time': round(self.backoff_time, 2),
+                'rate': round(self.rate, 2),
+                'capacity': self.capacity,
+            }
@@ -0,0 +1,381 @@
+import asyncio
+import json
+import os
+import time
+from collections import deque
+import aiohttp
+import pandas as pd
+import config
+from .rate_limiter import RateLimiter
+from .snapshot_store import SnapshotStore
+from .page_journal import PageJournal
+from .shoper_connect import ShoperAPIClient
+from .planner import print_timings
+from .metrics import metrics
+
+
+class AsyncShoperAPIClient:
+    """
+    asyncio counterpart of ShoperAPIClient.
+    One aiohttp session with a keep-alive connection pool serves every download,
+    at most `concurrency` requests are in flight and all of them share the rate limiter,
+    so a single event loop can download products, categories, producers and attributes at once.
+    """
+
+    def __init__(self, site_url, login, password, concurrency=None):
+
+        self.site_url = site_url
+        self.login = login
+        self.password = password
+        self.concurrency = concurrency or config.SHOPER_WORKERS
+        self.session = None
+        self.semaphore = None
+        self.auth_lock = None
+        self.token = None
+        self.token_expires = None
+        self.rate_limiter = RateLimiter(
+            rate=config.SHOPER_RATE,
+            capacity=config.SHOPER_BURST,
+            max_retries=config.SHOPER_MAX_RETRIES
+        )
+        self.stores = {
+            'products': SnapshotStore('shoper_all_products', 'product_id'),
+            'categories': SnapshotStore('shoper_all_categories', 'category_id'),
+            'producers': SnapshotStore('shoper_all_producers', 'producer_id'),
+            'attribute-groups': SnapshotStore('shoper_all_attribute_groups', 'attribute_group_id'),
+            'attributes': SnapshotStore('shoper_all_attributes', 'attribute_id'),
+        }
+        self.product_store = self.stores['products']
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def connect(self):
+        """Open the connection pool and authenticate with the API"""
+        if self.session is None:
+            connector = aiohttp.TCPConnector(limit=self.concurrency, keepalive_timeout=60)
+            self.session = aiohttp.ClientSession(connector=connector)
+            self.semaphore = asyncio.Semaphore(self.concurrency)
+            self.auth_lock = asyncio.Lock()
+
+        async with self.session.post(
+            f'{self.site_url}/webapi/rest/auth',
+            auth=aiohttp.BasicAuth(self.login, self.password)
+        ) as response:
+            if response.status == 200:
+                data = await response.json(content_type=None)
+                self.token = data.get('access_token')
+                expires_in = data.get('expires_in')
+                self.token_expires = time.monotonic() + float(expires_in) if expires_in else None
+                print("Shoper Authentication successful.")
+            else:
+                raise Exception(f"Authentication failed: {response.status}, {await response.text()}")
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def _refresh_token(self, used_token):
+        """Authenticate again, unless another task already replaced `used_token`."""
+        async with self.auth_lock:
+            if self.token == used_token:
+                print('Refreshing the Shoper token...')
+                metrics.count('shoper_reauthentications')
+                await self.connect()
+
+    async def _handle_request(self, method, url, **kwargs):
+        """
+        Send a request through the shared rate limiter and return (status, body text).
+        429 and 401 responses and expiring tokens are handled like in ShoperAPIClient._handle_request.
+        """
+        reauthenticated = False
+        for attempt in range(self.rate_limiter.max_retries + 1):
+            if self.token_expires is not None and time.monotonic() > self.token_expires - config.SHOPER_TOKEN_REFRESH_MARGIN:
+                await self._refresh_token(self.token)
+            token = self.token
+            headers = {'Authorization': f'Bearer {token}', 'Accept-Encoding': 'gzip, deflate'}
+
+            async with self.semaphore:
+                metrics.count('shoper_rate_limit_wait_seconds', await self.rate_limiter.acquire_async())
+                start = time.perf_counter()
+                async with self.session.request(method, url, headers=headers, **kwargs) as response:
+                    body = await response.read()
+                    metrics.observe('shoper_request_seconds', time.perf_counter() - start)
+                    metrics.count('shoper_requests', status=response.status)
+                    metrics.count('shoper_response_bytes', len(body))
+                    self.rate_limiter.update_from_headers(response.headers)
+                    # 429 Too Many Requests and the first 401 Unauthorized are retried
+                    if response.status != 429 and (response.status != 401 or reauthenticated):
+                        self.rate_limiter.record_success()
+                        return response.status, body.decode(response.get_encoding())
+                    retry_after = response.headers.get('Retry-After')
+
+            if response.status == 401:  # Expired token
+                await self._refresh_token(token)
+                reauthenticated = True
+                continue
+
+            if attempt < self.rate_limiter.max_retries:
+                delay = self.rate_limiter.throttle(attempt, retry_after)
+                metrics.count('shoper_retries')
+                metrics.count('shoper_backoff_seconds', delay)
+                print(f"Rate limit exceeded. Retrying after {delay:.1f} seconds...")
+
+        raise Exception(f"Rate limit exceeded after {self.rate_limiter.max_retries} retries: {url}")
+
+    async def _fetch_page(self, url, page, params=None):
+        """Fetch a single page of a paginated resource and return its JSON body."""
+        params = {'limit': config.SHOPER_LIMIT, 'page': page, **(params or {})}
+        status, text = await self._handle_request('GET', url, params={key: str(value) for key, value in params.items()})
+
+        if status != 200:
+            raise Exception(f"Failed to fetch data: {status}, {text}")
+
+        data = json.loads(text)
+        if not isinstance(data, dict) or 'list' not in data or 'pages' not in data:
+            raise Exception(f"Unexpected response for page {page}: {text[:500]}")
+        return data
+
+    async def _iter_pages(self, endpoint, params=None):
+        """
+        Yield pages of a paginated resource in page order, fetching a bounded number ahead.
+        Pages are journaled like in ShoperAPIClient._iter_pages.
+        """
+        url = f'{self.site_url}/webapi/rest/{endpoint}'
+
+        first_page = await self._fetch_page(url, 1, params)
+        number_of_pages = int(first_page['pages'])
+        journal = PageJournal(endpoint, params) if config.SHOPER_JOURNAL else None
+        journaled = journal.start(first_page) if journal else set()
+        if journal:
+            journal.write(1, first_page['list'])
+        print(f'{endpoint} page: 1/{number_of_pages}')
+        metrics.count('shoper_pages', endpoint=endpoint)
+        yield first_page['list']
+
+        async def fetch(page):
+            if page in journaled:
+                metrics.count('shoper_journal_pages', endpoint=endpoint)
+                return journal.read(page)
+            page_data = (await self._fetch_page(url, page, params))['list']
+            if journal:
+                journal.write(page, page_data)
+            return page_data
+
+        pending = deque()
+        next_page = 2
+        try:
+            while next_page <= number_of_pages or pending:
+                while next_page <= number_of_pages and len(pending) < self.concurrency * 2:
+                    pending.append((next_page, asyncio.create_task(fetch(next_page))))
+                    next_page += 1
+
+                page, task = pending.popleft()
+                page_data = await task
+                print(f'{endpoint} page: {page}/{number_of_pages}')
+                metrics.count('shoper_pages', endpoint=endpoint)
+                yield page_data
+        finally:
+            for _, task in pending:
+                task.cancel()
+
+        if journal:
+            journal.clear()
+
+    async def _get_all_pages(self, endpoint, params=None):
+        return [item async for page in self._iter_pages(endpoint, params) for item in page]
+
+    async def _save_resource(self, endpoint, records, high_water_mark_limit=None):
+        """Save records (a list or an async iterable) to the local snapshot and, optionally, to Excel."""
+        store = self.stores[endpoint]
+        with metrics.stage(f'download {endpoint}') as stage:
+            writer = store.writer(high_water_mark_limit)
+            try:
+                if hasattr(records, '__aiter__'):
+                    async for record in records:
+                        writer.write(record)
+                else:
+                    for record in records:
+                        writer.write(record)
+            except BaseException:
+                writer.abort()
+                raise
+            count = stage['rows'] = writer.commit()
+
+        if config.EXPORT_EXCEL:
+            with metrics.stage('excel export') as stage:
+                df = pd.DataFrame(store.iter_records())
+                df.to_excel(f'{os.path.splitext(store.path)[0]}.xlsx', index=False)
+                stage['rows'] = len(df)
+
+        return count
+
+    async def iter_products(self, params=None):
+        """Stream products from Shoper one by one, page after page."""
+        async for page in self._iter_pages('products', params):
+            for product in page:
+                yield product
+
+    async def get_all_products(self, incremental=None):
+        """Download products into the local snapshot, see ShoperAPIClient.get_all_products."""
+        if incremental is None:
+            incremental = config.SHOPER_INCREMENTAL_SYNC
+
+        count = None
+        if incremental and self.product_store.exists():
+            count = await self._sync_changed_products()
+
+        if count is None:
+            print("Downloading all products.")
+            count = await self._save_resource('products', self.iter_products(), ShoperAPIClient._high_water_mark_limit('products'))
+
+        print(f'{count} products loaded succesfully.')
+        return count
+
+    async def _sync_changed_products(self):
+        """Merge products changed since the snapshot's high-water mark, see ShoperAPIClient._sync_changed_products."""
+        high_water_mark = self.product_store.high_water_mark
+        if not high_water_mark:
+            return None
+
+        print(f"Downloading products changed since {high_water_mark}.")
+        high_water_mark_limit = ShoperAPIClient._high_water_mark_limit('products')
+        url = f'{self.site_url}/webapi/rest/products'
+        changed_products, count_page = await asyncio.gather(
+            self._get_all_pages('products', {'filters': json.dumps({'edit_date': {'>=': high_water_mark}})}),
+            self._fetch_page(url, 1, {'limit': 1})
+        )
+        changed = {product['product_id']: product for product in changed_products}
+        known_ids = {product['product_id'] for product in self.product_store.iter_records()}
+
+        shop_count = int(count_page.get('count', 0))
+        merged_count = len(known_ids | changed.keys())
+        if merged_count > shop_count:
+            print(f'{merged_count - shop_count} products were deleted in Shoper. Running a full download.')
+            return None
+
+        def merged_products():
+            for product in self.product_store.iter_records():
+                yield changed.pop(product['product_id'], product)
+            yield from changed.values()
+
+        count = await self._save_resource('products', merged_products(), high_water_mark_limit)
+        print(f'{len(changed_products)} changed products merged into {count} products.')
+        return count
+
+    async def _get_resource(self, endpoint, label):
+        print(f"Downloading all {label}.")
+        records = await self._get_all_pages(endpoint)
+        await self._save_resource(endpoint, records)
+        print(f'{label.capitalize()} loaded succesfully.')
+        return records
+
+    async def get_all_categories(self):
+        return pd.DataFrame(await self._get_resource('categories', 'categories'))
+
+    async def get_all_producers(self):
+        return pd.DataFrame(await self._get_resource('producers', 'producers'))
+
+    async def get_all_attribute_groups(self):
+        return await self._get_resource('attribute-groups', 'attribute groups')
+
+    async def get_all_attributes(self):
+        return pd.DataFrame(await self._get_resource('attributes', 'attributes'))
+
+    async def get_a_single_product(self, product_id):
+        status, text = await self._handle_request('GET', f'{self.site_url}/webapi/rest/products/{product_id}')
+        return pd.DataFrame(json.loads(text))
+
+    async def get_a_single_product_by_code(self, product_code):
+        url = f'{self.site_url}/webapi/rest/products'
+
+        try:
+            data = await self._fetch_page(url, 1, {'filters': json.dumps({"stock.code": product_code})})
+            product_list = data.get('list', [])
+
+            if not product_list:
+                print(f'X | Product {product_code} doesn\'t exist')
+                return None
+
+            return product_list[0]
+
+        except Exception as e:
+            print(f'Error fetching product {product_code}: {str(e)}')
+            return None
+
+    async def _timed(self, coroutine):
+        start = time.perf_counter()
+        try:
+            await coroutine
+            return {'status': 'ok', 'seconds': time.perf_counter() - start, 'error': None}
+        except Exception as e:
+            return {'status': 'failed', 'seconds': time.perf_counter() - start, 'error': str(e)}
+
+    async def get_all_data(self):
+        """Download every resource concurrently on the event loop, see ShoperAPIClient.get_all_data."""
+        downloads = {
+            'categories': self.get_all_categories(),
+            'producers': self.get_all_producers(),
+            'attribute-groups': self.get_all_attribute_groups(),
+            'attributes': self.get_all_attributes(),
+            'products': self.get_all_products(),
+        }
+        results = dict(zip(downloads, await asyncio.gather(*map(self._timed, downloads.values()))))
+
+        failed = [name for name, result in results.items() if result['status'] != 'ok']
+        if failed:
+            print(f'Failed to download: {", ".join(failed)}')
+        else:
+            print('All data downloaded from Shoper')
+        print_timings(results)
+        print(f'Rate limiter: {self.rate_limiter.stats()}')
+        return results
+
+
+class BlockingShoperAPIClient:
+    """
+    Thin blocking wrapper running AsyncShoperAPIClient on its own event loop.
+    Downloads match ShoperAPIClient; everything else (report formatting, code lookups
+    through the local catalogue) is served by a ShoperAPIClient reading the same snapshots,
+    which shares the token of the async client.
+    """
+
+    NETWORK_METHODS = {
+        'get_all_products',
+        'get_all_categories',
+        'get_all_producers',
+        'get_all_attribute_groups',
+        'get_all_attributes',
+        'get_a_single_product',
+        'get_all_data',
+    }
+
+    def __init__(self, site_url, login, password, concurrency=None):
+        self.loop = asyncio.new_event_loop()
+        self.client = AsyncShoperAPIClient(site_url, login, password, concurrency)
+        self.offline_client = ShoperAPIClient(site_url, login, password)
+
+    def connect(self):
+        """Authenticate with the API and hand the token to the ShoperAPIClient, which refreshes it on its own later."""
+        self.loop.run_until_complete(self.client.connect())
+        self.offline_client.token = self.client.token
+        self.offline_client.token_expires = self.client.token_expires
+        self.offline_client.session.headers.update({'Authorization': f'Bearer {self.client.token}'})
+
+    def close(self):
+        """Close the aiohttp session, the event loop and the ShoperAPIClient's session."""
+        if not self.loop.is_closed():
+            self.loop.run_until_complete(self.client.close())
+            self.loop.close()
+        self.offline_client.close()
+
+    def __getattr__(self, name):
+        if name in self.NETWORK_METHODS:
+            method = getattr(self.client, name)
+            return lambda *args, **kwargs: self.loop.run_until_complete(method(*args, **kwargs))
+        return getattr(self.offline_client, name)
@@ -1,9 +1,41 @@
 import pandas as pd
 import requests, time, os, json
+import threading
+from requests.adapters import HTTPAdapter
 import config
-import re
 import ast
-from bs4 import BeautifulSoup
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from .rate_limiter import RateLimiter
+from .snapshot_store import SnapshotStore, edit_date
+from .catalog import Catalog, stock_code
+from .page_journal import PageJournal
+from .attribute_index import AttributeIndex
+from .planner import run_tasks, print_timings
+from .metrics import metrics
+from .descriptions import parse_description, parse_descriptions, create_executor, create_cache
+
+REPORT_COLUMNS = [
+    'EAN',
+    'Nazwa',
+    'ID produktu',
+    'Typ produktu',
+    'Seria produktu',
+    'Link do edycji',
+    'Wymiary atrybut',
+    'Wymiary opis',
+    'Ilość',
+    'Data dodania produktu',
+    'Opis bez HTML',
+    'Komentarz',
+    'Osoba'
+]
+
+# Report filters: product type has to match every pattern, codes and names containing the exclusions are skipped
+PRODUCT_TYPE_PATTERNS = ['etui|szkło|pasek', 'telefon|tablet|smartwatch']
+EXCLUDED_CODE = 'out'
+EXCLUDED_NAME = 'bewood'
 
 class ShoperAPIClient:
 
@@ -12,8 +44,39 @@ class ShoperAPIClient:
         self.site_url = site_url
         self.login = login
         self.password = password
-        self.session = requests.Session()
+        self.session = self._create_session()
         self.token = None
+        self.token_expires = None
+        self.auth_lock = threading.Lock()
+        self.rate_limiter = RateLimiter(
+            rate=config.SHOPER_RATE,
+            capacity=config.SHOPER_BURST,
+            max_retries=config.SHOPER_MAX_RETRIES
+        )
+        self.stores = {
+            'products': SnapshotStore('shoper_all_products', 'product_id'),
+            'categories': SnapshotStore('shoper_all_categories', 'category_id'),
+            'producers': SnapshotStore('shoper_all_producers', 'producer_id'),
+            'attribute-groups': SnapshotStore('shoper_all_attribute_groups', 'attribute_group_id'),
+            'attributes': SnapshotStore('shoper_all_attributes', 'attribute_id'),
+        }
+        self.product_store = self.stores['products']
+        self.catalog = Catalog()
+        self._attribute_index = None
+        self._code_index = None
+
+    def _create_session(self):
+        """
+        Session with a keep-alive pool big enough for every concurrent download
+        (SHOPER_WORKERS pages of each of the five resources get_all_data downloads at once).
+        """
+        session = requests.Session()
+        pool_size = config.SHOPER_WORKERS * 5
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update({'Accept-Encoding': 'gzip, deflate'})
+        return session
 
     def connect(self):
         """Authenticate with the API"""
@@ -23,179 +86,265 @@ class ShoperAPIClient:
         )
 
         if response.status_code == 200:
-            self.token = response.json().get('access_token')
+            data = response.json()
+            self.token = data.get('access_token')
+            expires_in = data.get('expires_in')
+            self.token_expires = time.monotonic() + float(expires_in) if expires_in else None
             self.session.headers.update({'Authorization': f'Bearer {self.token}'})
             print("Shoper Authentication successful.")
         else:
             raise Exception(f"Authentication failed: {response.status_code}, {response.text}")
 
-    def _handle_request(self, method, url, **kwargs):
-        """Handle API requests with automatic retry on 429 errors."""
-        while True:
-            response = self.session.request(method, url, **kwargs)
-
-            if response.status_code == 429:  # Too Many Requests
-                retry_after = int(response.headers.get('Retry-After', 1))
-                print(f"Rate limit exceeded. Retrying after {retry_after} seconds...")
-                time.sleep(retry_after)
-            else:
-                return response
+    def close(self):
+        """Close the connection pool"""
+        self.session.close()
 
-    def get_all_products(self):
-        products = []
-        page = 1
-        url = f'{self.site_url}/webapi/rest/products'
+    def _refresh_token(self, used_token):
+        """Authenticate again, unless another worker already replaced `used_token`."""
+        with self.auth_lock:
+            if self.token == used_token:
+                print('Refreshing the Shoper token...')
+                metrics.count('shoper_reauthentications')
+                self.connect()
 
-        print("Downloading all products.")
-        while True: 
-            params = {'limit': config.SHOPER_LIMIT, 'page': page}
-            response = self._handle_request('GET', url, params=params)
-            data = response.json()
-            number_of_pages = data['pages']
+    def _token_expiring(self):
+        return self.token_expires is not None and time.monotonic() > self.token_expires - config.SHOPER_TOKEN_REFRESH_MARGIN
 
-            if response.status_code != 200:
-                raise Exception(f"Failed to fetch data: {response.status_code}, {response.text}")
+    def _handle_request(self, method, url, **kwargs):
+        """
+        Send a request through the shared rate limiter.
+        429 responses pause the limiter for every worker and are retried
+        with a jittered backoff, up to config.SHOPER_MAX_RETRIES times.
+        The token is refreshed shortly before it expires, and once on a 401 response.
+        """
+        reauthenticated = False
+        for attempt in range(self.rate_limiter.max_retries + 1):
+            if self.token and self._token_expiring():
+                self._refresh_token(self.token)
+            token = self.token
+
+            metrics.count('shoper_rate_limit_wait_seconds', self.rate_limiter.acquire())
+            start = time.perf_counter()
+            response = self.session.request(method, url, **kwargs)
+            metrics.observe('shoper_request_seconds', time.perf_counter() - start)
+            metrics.count('shoper_requests', status=response.status_code)
+            metrics.count('shoper_response_bytes', len(response.content))
+            self.rate_limiter.update_from_headers(response.headers)
+
+            if response.status_code == 401 and token and not reauthenticated:  # Unauthorized - expired token
+                self._refresh_token(token)
+                reauthenticated = True
+                continue
 
-            page_data = response.json().get('list', [])
+            if response.status_code != 429:  # Too Many Requests
+                self.rate_limiter.record_success()
+                return response
 
-            if not page_data:  # If no data is returned
-                break
+            if attempt < self.rate_limiter.max_retries:
+                delay = self.rate_limiter.throttle(attempt, response.headers.get('Retry-After'))
+                metrics.count('shoper_retries')
+                metrics.count('shoper_backoff_seconds', delay)
+                print(f"Rate limit exceeded. Retrying after {delay:.1f} seconds...")
+
+        raise Exception(f"Rate limit exceeded after {self.rate_limiter.max_retries} retries: {url}")
+
+    def _fetch_page(self, url, page, params=None):
+        """Fetch a single page of a paginated resource and return its JSON body."""
+        params = {'limit': config.SHOPER_LIMIT, 'page': page, **(params or {})}
+        response = self._handle_request('GET', url, params=params)
+
+        if response.status_code != 200:
+            raise Exception(f"Failed to fetch data: {response.status_code}, {response.text}")
+
+        data = response.json()
+        if not isinstance(data, dict) or 'list' not in data or 'pages' not in data:
+            raise Exception(f"Unexpected response for page {page}: {response.text[:500]}")
+        return data
+
+    def _iter_pages(self, endpoint, params=None):
+        """
+        Yield pages of a paginated resource in page order.
+        The first page tells how many pages there are, the rest is fetched
+        concurrently by a bounded pool of workers sharing the session.
+        Only a few pages are fetched ahead, so memory stays flat
+        and the consumer works while the next pages are downloading.
+        With SHOPER_JOURNAL every page is saved to a PageJournal as soon as it arrives,
+        so a crawl restarted after an error only downloads the pages it's missing.
+        The journal is cleared once every page has been handed over.
+        """
+        url = f'{self.site_url}/webapi/rest/{endpoint}'
+
+        first_page = self._fetch_page(url, 1, params)
+        number_of_pages = int(first_page['pages'])
+        journal = PageJournal(endpoint, params) if config.SHOPER_JOURNAL else None
+        journaled = journal.start(first_page) if journal else set()
+        if journal:
+            journal.write(1, first_page['list'])
+        print(f'Page: 1/{number_of_pages}')
+        metrics.count('shoper_pages', endpoint=endpoint)
+        yield first_page['list']
+
+        def fetch(page):
+            if page in journaled:
+                metrics.count('shoper_journal_pages', endpoint=endpoint)
+                return journal.read(page)
+            page_data = self._fetch_page(url, page, params)['list']
+            if journal:
+                journal.write(page, page_data)
+            return page_data
+
+        if number_of_pages > 1:
+            with ThreadPoolExecutor(max_workers=config.SHOPER_WORKERS) as executor:
+                pending = deque()
+                next_page = 2
+                while next_page <= number_of_pages or pending:
+                    while next_page <= number_of_pages and len(pending) < config.SHOPER_WORKERS * 2:
+                        pending.append((next_page, executor.submit(fetch, next_page)))
+                        next_page += 1
+
+                    page, future = pending.popleft()
+                    page_data = future.result()
+                    print(f'Page: {page}/{number_of_pages}')
+                    metrics.count('shoper_pages', endpoint=endpoint)
+                    yield page_data
+
+        if journal:
+            journal.clear()
+
+    def _get_all_pages(self, endpoint, params=None):
+        """Download every page of a paginated resource into a single list."""
+        return [item for page in self._iter_pages(endpoint, params) for item in page]
+
+    @staticmethod
+    def _high_water_mark_limit(endpoint):
+        """
+        Newest high-water mark a crawl of `endpoint` starting now can vouch for.
+        A product edited after its page was downloaded keeps the older edit_date in the snapshot,
+        so the mark stops at the start of the crawl (or of the journaled crawl it resumes),
+        less SHOPER_SYNC_OVERLAP.
+        """
+        started = time.time()
+        if config.SHOPER_JOURNAL:
+            started = min(started, PageJournal(endpoint).resumable_since() or started)
+        return edit_date(started - config.SHOPER_SYNC_OVERLAP)
+
+    def _save_resource(self, endpoint, records, high_water_mark_limit=None):
+        """Save downloaded records to the local snapshot and, optionally, to Excel."""
+        store = self.stores[endpoint]
+        with metrics.stage(f'download {endpoint}') as stage:
+            count = stage['rows'] = store.save(records, high_water_mark_limit)
+        if endpoint == 'products':
+            self._code_index = None
+        if config.CATALOG_INDEX and endpoint in Catalog.TABLES:
+            with metrics.stage('catalog index') as stage:
+                stage['rows'] = self.catalog.rebuild(endpoint, store)
+
+        if config.EXPORT_EXCEL:
+            with metrics.stage('excel export') as stage:
+                df = pd.DataFrame(store.iter_records())
+                df.to_excel(f'{os.path.splitext(store.path)[0]}.xlsx', index=False)
+                stage['rows'] = len(df)
+
+        return count
+
+    def iter_products(self, params=None):
+        """Stream products from Shoper one by one, page after page."""
+        for page in self._iter_pages('products', params):
+            yield from page
+
+    def get_all_products(self, incremental=None):
+        """
+        Download products and stream them into the local snapshot.
+        In incremental mode only products edited since the last sync are fetched
+        and merged into the snapshot; a full crawl is done when there is no snapshot yet
+        or when products were deleted in the shop.
+        Returns the number of products in the snapshot.
+        """
+        if incremental is None:
+            incremental = config.SHOPER_INCREMENTAL_SYNC
+
+        count = None
+        if incremental and self.product_store.exists():
+            count = self._sync_changed_products()
+
+        if count is None:
+            print("Downloading all products.")
+            count = self._save_resource('products', self.iter_products(), self._high_water_mark_limit('products'))
+
+        print(f'{count} products loaded succesfully.')
+        return count
+
+    def _sync_changed_products(self):
+        """
+        Merge products changed since the snapshot's high-water mark into the snapshot.
+        Returns the number of products in the merged snapshot or None when a full crawl is needed.
+        """
+        high_water_mark = self.product_store.high_water_mark
+        if not high_water_mark:
+            return None
 
-            # FOR TESTING
-            # if page == 11:
-            #     break
+        print(f"Downloading products changed since {high_water_mark}.")
+        high_water_mark_limit = self._high_water_mark_limit('products')
+        changed = {
+            product['product_id']: product
+            for product in self.iter_products({'filters': json.dumps({'edit_date': {'>=': high_water_mark}})})
+        }
+        known_ids = {product['product_id'] for product in self.product_store.iter_records()}
+        number_of_changed = len(changed)
 
-            print(f'Page: {page}/{number_of_pages}')
-            products.extend(page_data)
-            page += 1
+        # Deleted products never show up as changed - compare with the shop's total instead
+        url = f'{self.site_url}/webapi/rest/products'
+        shop_count = int(self._fetch_page(url, 1, {'limit': 1}).get('count', 0))
+        merged_count = len(known_ids | changed.keys())
+        if merged_count > shop_count:
+            print(f'{merged_count - shop_count} products were deleted in Shoper. Running a full download.')
+            return None
 
-        df = pd.DataFrame(products)
-        df.to_excel(os.path.join(config.SHEETS_DIR, 'shoper_all_products.xlsx'), index=False)
+        def merged_products():
+            for product in self.product_store.iter_records():
+                yield changed.pop(product['product_id'], product)
+            yield from changed.values()
 
-        print('Products loaded succesfully.')
-        return df
+        count = self._save_resource('products', merged_products(), high_water_mark_limit)
+        print(f'{number_of_changed} changed products merged into {count} products.')
+        return count
 
     def get_all_categories(self):
-        categories = []
-        page = 1
-        url = f'{self.site_url}/webapi/rest/categories'
-
-        print("Downloading all categories.")   
-        while True:
-            params = {'limit': config.SHOPER_LIMIT, 'page': page}
-            response = self._handle_request('GET', url, params=params)
-            data = response.json()
-            number_of_pages = data['pages']
-
-            if response.status_code != 200:
-                raise Exception(f"Failed to fetch data: {response.status_code}, {response.text}")
+        print("Downloading all categories.")
+        categories = self._get_all_pages('categories')
 
-            page_data = response.json().get('list', [])
-
-            if not page_data:
-                break
-        
-            print(f'Page: {page}/{number_of_pages}')
-            categories.extend(page_data)
-            page += 1
-        
-        df = pd.DataFrame(categories)
-        df.to_excel(os.path.join(self.sheets_dir, 'shoper_all_categories.xlsx'), index=False)
+        self._save_resource('categories', categories)
 
         print('Categories loaded succesfully.')
-        return df
-    
-    def get_all_producers(self):
-        producers = []
-        page = 1
-        url = f'{self.site_url}/webapi/rest/producers'
+        return pd.DataFrame(categories)
 
+    def get_all_producers(self):
         print("Downloading all producers.")
+        producers = self._get_all_pages('producers')
 
-        while True:
-            params = {'limit': config.SHOPER_LIMIT, 'page': page}
-            response = self._handle_request('GET', url, params=params)
-            data = response.json()
-            number_of_pages = data['pages']
-
-            if response.status_code != 200:
-                raise Exception(f"Failed to fetch data: {response.status_code}, {response.text}")
-
-            page_data = response.json().get('list', [])
-
-            if not page_data:
-                break
-        
-            print(f'Page: {page}/{number_of_pages}')
-            producers.extend(page_data)
-            page += 1
-
-        df = pd.DataFrame(producers)
-        df.to_excel(os.path.join(self.sheets_dir, 'shoper_all_producers.xlsx'), index=False)
+        self._save_resource('producers', producers)
 
         print('Producers loaded succesfully.')
-        return df
+        return pd.DataFrame(producers)
 
     def get_all_attribute_groups(self):
-        attribute_groups = []
-        page = 1
-        url = f'{self.site_url}/webapi/rest/attribute-groups'
-
         print("Downloading all attribute groups.")
-        while True:
-            params = {'limit': config.SHOPER_LIMIT, 'page': page}
-            response = self._handle_request('GET', url, params=params)
-            data = response.json()
-            number_of_pages = data['pages']
-
-            if response.status_code != 200:
-                raise Exception(f"Failed to fetch data: {response.status_code}, {response.text}")
-
-            page_data = response.json().get('list', [])
-
-            if not page_data:  # If no data is returned
-                break
-
-            print(f'Page: {page}/{number_of_pages}')
-            attribute_groups.extend(page_data)
-            page += 1
+        attribute_groups = self._get_all_pages('attribute-groups')
 
-        df = pd.DataFrame(attribute_groups)
-        df.to_excel(os.path.join(self.sheets_dir, 'shoper_all_attribute_groups.xlsx'), index=False)
+        self._save_resource('attribute-groups', attribute_groups)
 
         print('Attribute groups loaded succesfully.')
         return attribute_groups
 
     def get_all_attributes(self):
-        attributes = []
-        page = 1
-        url = f'{self.site_url}/webapi/rest/attributes'
-
         print("Downloading all attributes.")
-        while True:
-            params = {'limit': config.SHOPER_LIMIT, 'page': page}
-            response = self._handle_request('GET', url, params=params)
-            data = response.json()
-            number_of_pages = data['pages']
-
-            if response.status_code != 200:
-                raise Exception(f"Failed to fetch data: {response.status_code}, {response.text}")
-
-            page_data = response.json().get('list', [])
-
-            if not page_data:  # If no data is returned
-                break
+        attributes = self._get_all_pages('attributes')
 
-            print(f'Page: {page}/{number_of_pages}')
-            attributes.extend(page_data)
-            page += 1
-
-        df = pd.DataFrame(attributes)
-        df.to_excel(os.path.join(self.sheets_dir, 'shoper_all_attributes.xlsx'), index=False)
+        self._save_resource('attributes', attributes)
 
         print('Attributes loaded succesfully.')
-        return df
-    
+        return pd.DataFrame(attributes)
+
     def get_a_single_product(self, product_id):
         url = f'{self.site_url}/webapi/rest/products/{product_id}'
 
@@ -204,7 +353,14 @@ class ShoperAPIClient:
 
         return pd.DataFrame(product)
     
-    def get_a_single_product_by_code(self, product_code):
+    def get_a_single_product_by_code(self, product_code, use_local=True):
+        """Return a product by stock code, from the local catalogue (CATALOG_INDEX) when it's there, otherwise from Shoper."""
+        if use_local and config.CATALOG_INDEX and self.product_store.exists():
+            self.catalog.ensure_current('products', self.product_store)
+            product = self.catalog.products_by_codes([product_code]).get(str(product_code))
+            if product:
+                return product
+
         url = f'{self.site_url}/webapi/rest/products'
 
         product_filter = {
@@ -227,189 +383,223 @@ class ShoperAPIClient:
             print(f'Error fetching product {product_code}: {str(e)}')
             return None
 
+    def get_products_by_codes(self, product_codes, use_local=True):
+        """
+        Look up many products by stock code at once.
+        Codes are resolved from the local catalogue (or the products snapshot without CATALOG_INDEX) first; the rest is fetched
+        with 'IN' filters, SHOPER_LIMIT codes per request, requests sent concurrently.
+        Returns a dict code -> product (None for codes that don't exist).
+        """
+        codes = list(dict.fromkeys(str(code) for code in product_codes))
+        products = {}
+
+        if use_local and config.CATALOG_INDEX and self.product_store.exists():
+            self.catalog.ensure_current('products', self.product_store)
+            products.update(self.catalog.products_by_codes(codes))
+        elif use_local:
+            for code in codes:
+                if code in self.code_index:
+                    products[code] = self.code_index[code]
+
+        missing = [code for code in codes if code not in products]
+        if missing:
+            url = f'{self.site_url}/webapi/rest/products'
+            batches = [missing[start:start + config.SHOPER_LIMIT] for start in range(0, len(missing), config.SHOPER_LIMIT)]
+
+            def fetch_batch(batch):
+                params = {'filters': json.dumps({'stock.code': {'IN': batch}})}
+                return self._fetch_page(url, 1, params).get('list', [])
+
+            with ThreadPoolExecutor(max_workers=config.SHOPER_WORKERS) as executor:
+                for product_list in executor.map(fetch_batch, batches):
+                    for product in product_list:
+                        products[self._product_code(product)] = product
+
+        found = {code: products.get(code) for code in codes}
+        print(f'{sum(1 for product in found.values() if product)}/{len(codes)} products found ({len(codes) - len(missing)} from the local snapshot).')
+        return found
+
+    @staticmethod
+    def _product_code(product):
+        return stock_code(product)
+
+    @property
+    def code_index(self):
+        """Stock code -> product index built from the local products snapshot."""
+        if self._code_index is None:
+            self._code_index = {self._product_code(product): product for product in self.product_store.iter_records()}
+        return self._code_index
+
     def get_all_data(self):
-        self.get_all_categories()
-        self.get_all_producers()
-        self.get_all_attribute_groups
-        self.get_all_attributes()
-        self.get_all_products()
-        
-        print('All data downloaded from Shoper')
+        """
+        Download every resource in parallel under the shared rate limiter.
+        Each resource is saved as soon as it's ready and a failure of one doesn't discard the others.
+        Returns the per-resource results of the plan.
+        """
+        results = run_tasks({
+            'categories': (self.get_all_categories, []),
+            'producers': (self.get_all_producers, []),
+            'attribute-groups': (self.get_all_attribute_groups, []),
+            'attributes': (self.get_all_attributes, []),
+            'products': (self.get_all_products, []),
+        })
+        self._attribute_index = None
+
+        failed = [name for name, result in results.items() if result['status'] != 'ok']
+        if failed:
+            print(f'Failed to download: {", ".join(failed)}')
+        else:
+            print('All data downloaded from Shoper')
+        print_timings(results)
+        print(f'Rate limiter: {self.rate_limiter.stats()}')
+        return results
+
+    def get_all_active_products_formatted(self, download=False):
+        """
+        Build the dimensions report.
+        Products are streamed in chunks from the local snapshot, or straight from Shoper
+        when download=True (they are written to the snapshot on the way, so formatting
+        overlaps with the download). Only rows passing the product filters are kept in memory.
+        """
+        print('Loading products...')
+        if download:
+            products = self.product_store.write_through(self.iter_products(), self._high_water_mark_limit('products'))
+        elif self.product_store.exists() and config.CATALOG_INDEX:
+            self.catalog.ensure_current('products', self.product_store)
+            products = self.catalog.report_candidates(
+                self.attribute_index.type_attribute, PRODUCT_TYPE_PATTERNS, EXCLUDED_CODE, EXCLUDED_NAME
+            )
+        elif self.product_store.exists():
+            products = self.product_store.iter_records()
+        else:
+            products = self._load_products_from_excel().to_dict('records')
+
+        formatted_chunks = []
+        processed = 0
+        texts = {}
+
+        with metrics.stage('format products') as stage, create_executor() as executor, create_cache() as cache:
+            for chunk in self._chunked(products, config.PROCESSING_CHUNK_SIZE):
+                formatted_chunks.append(self._format_products(chunk, executor, cache, texts))
+                processed += len(chunk)
+                stage['rows'] = processed
+                print(f'Processing products: {processed}')
+
+            if cache is not None:
+                print(f'Description cache: {cache.stats()}')
+
+        if formatted_chunks:
+            formatted_product_df = pd.concat(formatted_chunks, ignore_index=True)
+            # A few distinct values repeated on every row - stored once per value
+            formatted_product_df = formatted_product_df.astype({'Typ produktu': 'category', 'Seria produktu': 'category'})
+        else:
+            formatted_product_df = pd.DataFrame(columns=REPORT_COLUMNS)
+        with metrics.stage('excel export') as stage:
+            formatted_product_df.to_excel(os.path.join(config.SHEETS_DIR, 'shoper_all_active_products.xlsx'), index=False)
+            stage['rows'] = len(formatted_product_df)
 
-    def get_all_active_products_formatted(self):
+        print(f'{len(formatted_product_df)} products processed')
+        return formatted_product_df
 
-        # Load products, categories, producers from excel and change its columns to Pythonic Dictionaries/Lists
-        print('Loading products...')
+    @staticmethod
+    def _chunked(iterable, size):
+        """Split an iterable into lists of at most `size` elements."""
+        iterator = iter(iterable)
+        while chunk := list(islice(iterator, size)):
+            yield chunk
+
+    @staticmethod
+    def _compact_text(text, texts=None):
+        """Cut a clean description to config.DESCRIPTION_PREVIEW_LENGTH and keep one copy of every distinct text in `texts`."""
+        if config.DESCRIPTION_PREVIEW_LENGTH is not None:
+            text = text[:config.DESCRIPTION_PREVIEW_LENGTH]
+        return text if texts is None else texts.setdefault(text, text)
+
+    def _format_products(self, products, executor=None, cache=None, texts=None):
+        """
+        Format a chunk of raw products and return the ones missing dimensions.
+        Nested fields are flattened into columns once, then the product filters
+        run as vectorised pandas operations. Descriptions are only parsed
+        for products that pass every other filter.
+        Clean descriptions of the kept rows are shared through `texts` (a dict kept across chunks),
+        so a description repeated on many products is held in memory once.
+        """
+        attributes = pd.Series([product.get('attributes') for product in products], dtype=object)
+        translations = [product['translations']['pl_PL'] for product in products]
+
+        chunk = pd.DataFrame({
+            'EAN': pd.Series([product['code'] for product in products], dtype=object),
+            'Nazwa': pd.Series([translation['name'] for translation in translations], dtype=object),
+            'ID produktu': [product['product_id'] for product in products],
+            'Typ produktu': attributes.map(self.attribute_index.product_type),
+            'Seria produktu': attributes.map(self.attribute_index.product_series),
+            'Ilość': pd.Series([product['stock']['stock'] for product in products], dtype=object),
+            'add_date': pd.Series([product['add_date'] for product in products], dtype=object),
+            'description_html': pd.Series([translation['description'] for translation in translations], dtype=object),
+            'attributes': attributes,
+        })
+
+        # Product filters
+        product_type = chunk['Typ produktu'].str.lower()
+        mask = (
+            attributes.map(lambda x: isinstance(x, dict) and len(x) > 0)
+            & (chunk['Ilość'] != '0')
+            & ~chunk['EAN'].str.lower().str.contains(EXCLUDED_CODE, regex=False, na=False)
+            & ~chunk['Nazwa'].str.lower().str.contains(EXCLUDED_NAME, regex=False, na=False)
+        )
+        for pattern in PRODUCT_TYPE_PATTERNS:
+            mask &= product_type.str.contains(pattern, na=False)
+        chunk = chunk[mask]
+
+        attributes_str = chunk['attributes'].map(lambda x: ' '.join(str(value) for value in x.values()).lower())
+        chunk = chunk[~attributes_str.str.contains('folia|obiektyw|obudowa 360', na=False)]
+
+        with metrics.stage('parse descriptions') as stage:
+            descriptions = parse_descriptions(chunk['description_html'], executor, cache)
+            stage['rows'] = len(descriptions)
+        chunk = chunk.assign(**{
+            'Wymiary atrybut': chunk['attributes'].map(self.find_dimensions_attribute),
+            'Wymiary opis': [dimensions for dimensions, _ in descriptions],
+            'Opis bez HTML': [description for _, description in descriptions],
+        })
+        chunk = chunk[(chunk['Wymiary atrybut'] == '') | (chunk['Wymiary opis'] == '')]
+
+        chunk = chunk.assign(**{
+            'Opis bez HTML': chunk['Opis bez HTML'].map(lambda text: self._compact_text(text, texts)),
+            'Link do edycji': f'{self.site_url}/admin/products/edit/id/' + chunk['ID produktu'].astype(str),
+            'Data dodania produktu': pd.to_datetime(
+                chunk['add_date'].str.split(n=1).str[0], format='%Y-%m-%d'
+            ).dt.strftime('%d-%m-%Y'),
+            'Komentarz': '',
+            'Osoba': '',
+        })
+
+        return chunk[REPORT_COLUMNS]
+
+    def _load_products_from_excel(self):
+        """Load products from a legacy shoper_all_products.xlsx export, rebuilding nested columns."""
         products = pd.read_excel(os.path.join(config.SHEETS_DIR, 'shoper_all_products.xlsx'))
         products = products.replace({pd.NA: None})
-        
+
         for column in products.columns:
             try:
                 products[column] = products[column].apply(lambda x: ast.literal_eval(x) if isinstance(x, str) and (x.startswith('{') or x.startswith('[')) else x)
             except (ValueError, SyntaxError):
                 continue
 
-        # try:
-        #     categories = pd.read_excel(os.path.join(config.SHEETS_DIR, 'shoper_all_categories.xlsx'))
-        #     products = products.replace({pd.NA: None})
-            
-        #     for column in categories.columns:
-        #         try:
-        #             products[column] = products[column].apply(lambda x: ast.literal_eval(x) if isinstance(x, str) and (x.startswith('{') or x.startswith('[')) else x)
-        #         except (ValueError, SyntaxError):
-        #             continue
-        # except FileNotFoundError:
-        #     print('File shoper_all_categories.xlsx not found')
-        #     return pd.DataFrame()  # Return empty DataFrame instead of None
-        
-        # try:
-        #     producers = pd.read_excel(os.path.join(config.SHEETS_DIR, 'shoper_all_producers.xlsx'))
-        #     products = products.replace({pd.NA: None})
-            
-        #     for column in producers.columns:
-        #         try:
-        #             products[column] = products[column].apply(lambda x: ast.literal_eval(x) if isinstance(x, str) and (x.startswith('{') or x.startswith('[')) else x)
-        #         except (ValueError, SyntaxError):
-        #             continue
-        # except FileNotFoundError:
-        #     print('File shoper_all_producers.xlsx not found')
-        #     return pd.DataFrame()  # Return empty DataFrame instead of None
-            
-        formatted_products = []
-
-        print(f'Processing {len(products)} products')
-
-        for _, product in products.iterrows():
-            
-            attributes = product['attributes']
-            
-            product_type = ''
-            product_series = ''
-            if isinstance(attributes, dict):
-                if isinstance(attributes.get('550'), dict):
-                    product_type = attributes['550'].get('1370', '')
-                    product_series = attributes['550'].get('1160', '')
-
-            description_dimensions, description = self.find_dimensions_description(product['translations']['pl_PL']['description'])
-
-            formatted_product = {
-                'EAN': product['code'],
-                'Nazwa': product['translations']['pl_PL']['name'],
-                'ID produktu': product['product_id'],
-                'Typ produktu': product_type,
-                'Seria produktu': product_series,
-                'Link do edycji': f'{self.site_url}/admin/products/edit/id/{product["product_id"]}',
-                'Wymiary atrybut': self.find_dimensions_attribute(attributes),
-                'Wymiary opis': description_dimensions,
-                'Ilość': product['stock']['stock'],
-                'Data dodania produktu': pd.to_datetime(product['add_date'].split()[0]).strftime('%d-%m-%Y'),
-                'Opis bez HTML': description,
-                'Komentarz': '',
-                'Osoba': ''
-            }
-            if attributes and isinstance(attributes, dict) and len(attributes) > 0:
-                
-                attributes_str = ' '.join(str(value) for value in attributes.values()).lower()
-
-                # Product filters
-                if formatted_product['Wymiary atrybut'] == '' or formatted_product['Wymiary opis'] == '':
-                    if formatted_product['Ilość'] != '0':
-                        if ('etui' in formatted_product['Typ produktu'].lower() or 
-                            'szkło' in formatted_product['Typ produktu'].lower() or 
-                            'pasek' in formatted_product['Typ produktu'].lower()):
-                            if ('telefon' in formatted_product['Typ produktu'].lower() or
-                                'tablet' in formatted_product['Typ produktu'].lower() or
-                                'smartwatch' in formatted_product['Typ produktu'].lower()):
-                                if 'out' not in formatted_product['EAN'].lower():
-                                    if 'bewood' not in formatted_product['Nazwa'].lower():
-                                        if 'folia' not in attributes_str and 'obiektyw' not in attributes_str:
-                                            if 'obudowa 360' not in attributes_str:
-                                                formatted_products.append(formatted_product)
-
-        formatted_product_df = pd.DataFrame(formatted_products)
-        formatted_product_df.to_excel(os.path.join(config.SHEETS_DIR, 'shoper_all_active_products.xlsx'), index=False)
+        return products
 
-        print(f'{len(formatted_product_df)} products processed')
-        return formatted_product_df
-    
     def find_dimensions_description(self, product_description):
-        # Remove all HTML tags and get clean text
-        soup = BeautifulSoup(product_description, 'html.parser')
-        description_clean = soup.get_text()
-        description_clean = description_clean.replace('\n', ' ')
-        description_clean = ' '.join(description_clean.split())
-        description = description_clean
-
-        # Try to find three dimensions pattern first
-        three_dim_pattern = r'(\d+[.,]\d+|\d+)\s*(?:cm|mm)?\s*(?:[xX×]|-)\s*(\d+[.,]\d+|\d+)\s*(?:cm|mm)?\s*(?:[xX×]|-)\s*(\d+[.,]\d+|\d+)\s*(?:cm|mm)?'
-        three_dim_match = re.search(three_dim_pattern, description)
-        
-        if three_dim_match:
-            # If we find three dimensions, use all of them
-            product_dimensions = f"{three_dim_match.group(1)} x {three_dim_match.group(2)} x {three_dim_match.group(3)}"
-        else:
-            # Try to find dimensions labeled with Długość/Szerokość
-            dim_labeled_pattern = r'(?:Długość|Dlugosc)[^:]*:\s*(\d+[.,]\d+|\d+)\s*(?:cm|mm)?.*?(?:Szerokość|Szerokosc)[^:]*:\s*(\d+[.,]\d+|\d+)\s*(?:cm|mm)?'
-            dim_labeled_match = re.search(dim_labeled_pattern, description, re.IGNORECASE)
-            
-            if dim_labeled_match:
-                product_dimensions = f"{dim_labeled_match.group(1)} x {dim_labeled_match.group(2)}"
-            else:
-                # Try to find X-Y labeled dimensions
-                xy_pattern = r'X-[^:]*:\s*(\d+[.,]\d+|\d+)\s*(?:cm|mm)?.*?Y-[^:]*:\s*(\d+[.,]\d+|\d+)\s*(?:cm|mm)?'
-                xy_match = re.search(xy_pattern, description, re.IGNORECASE)
-                
-                if xy_match:
-                    product_dimensions = f"{xy_match.group(1)} x {xy_match.group(2)}"
-                else:
-                    # Try to find two dimensions pattern
-                    dimension_pattern = r'(\d+[.,]\d+|\d+)\s*(?:cm|mm)?\s*(?:[xX×]|-)\s*(\d+[.,]\d+|\d+)\s*(?:cm|mm)?'
-                    dimensions_match = re.search(dimension_pattern, description)
-                    if dimensions_match:
-                        product_dimensions = f"{dimensions_match.group(1)} x {dimensions_match.group(2)}"
-                    else:
-                        product_dimensions = ''
-
-        return [product_dimensions, description]
+        return parse_description(product_description)
 
     def find_dimensions_attribute(self, attributes):
-        # Safety check
-        if not isinstance(attributes, dict):
-            return ''
-        
-        product_length = ''
-        product_height = ''
-
-        # Check if the attribute group exists and is a dictionary
-        if '552' in attributes and isinstance(attributes['552'], dict) and attributes['552'].get('1191'):
-            product_length = attributes['552']['1191']
-        elif '553' in attributes and isinstance(attributes['553'], dict) and attributes['553'].get('1192'):
-            product_length = attributes['553']['1192']
-        elif '555' in attributes and isinstance(attributes['555'], dict) and attributes['555'].get('1207'):
-            product_length = attributes['555']['1207']
-        elif '556' in attributes and isinstance(attributes['556'], dict) and attributes['556'].get('1217'):
-            product_length = attributes['556']['1217']
-        elif '560' in attributes and isinstance(attributes['560'], dict) and attributes['560'].get('1249'):
-            product_length = attributes['560']['1249']
-        elif '562' in attributes and isinstance(attributes['562'], dict) and attributes['562'].get('1268'):
-            product_length = attributes['562']['1268']
-
-        if '552' in attributes and isinstance(attributes['552'], dict) and attributes['552'].get('1196'):
-            product_height = attributes['552']['1196']
-        elif '553' in attributes and isinstance(attributes['553'], dict) and attributes['553'].get('1193'):
-            product_height = attributes['553']['1193']
-        elif '555' in attributes and isinstance(attributes['555'], dict) and attributes['555'].get('1208'):
-            product_height = attributes['555']['1208']
-        elif '556' in attributes and isinstance(attributes['556'], dict) and attributes['556'].get('1218'):
-            product_height = attributes['556']['1218']
-        elif '560' in attributes and isinstance(attributes['560'], dict) and attributes['560'].get('1250'):
-            product_height = attributes['560']['1250']
-        elif '561' in attributes and isinstance(attributes['561'], dict) and attributes['561'].get('1270'):
-            product_height = attributes['561']['1270']
-        elif '562' in attributes and isinstance(attributes['562'], dict) and attributes['562'].get('1269'):
-            product_height = attributes['562']['1269']
-
-        if product_length != '' and product_height != '':
-            return f"{product_length} x {product_height}"
-        else:
-            return ''
\ No newline at end of file
+        return self.attribute_index.dimensions(attributes)
+
+    @property
+    def attribute_index(self):
+        """Attribute lookup index compiled from config, checked against downloaded attributes when available."""
+        if self._attribute_index is None:
+            attributes_store = self.stores['attributes']
+            metadata = attributes_store.iter_records() if attributes_store.exists() else None
+            self._attribute_index = AttributeIndex.from_config(metadata)
+        return self._attribute_index
@@ -0,0 +1,134 @@
+import json
+import os
+import time
+import config
+
+
+def edit_date(timestamp):
+    """Format a time.time() timestamp like Shoper's edit_date (shop time, taken to be this machine's local time)."""
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp))
+
+
+class SnapshotStore:
+    """
+    Local snapshot of a Shoper resource kept as JSON Lines (one raw API payload per line)
+    together with a small metadata file holding the sync high-water mark.
+    Nested data (attributes, translations, stock) is stored as-is, so nothing has to be re-parsed.
+    """
+
+    def __init__(self, name, key):
+        """
+        Args:
+            name (str): File name (without extension) inside SHEETS_DIR.
+            key (str): Field identifying a record, e.g. 'product_id'.
+        """
+        self.key = key
+        self.path = os.path.join(config.SHEETS_DIR, f'{name}.jsonl')
+        self.meta_path = os.path.join(config.SHEETS_DIR, f'{name}.meta.json')
+
+    def exists(self):
+        return os.path.exists(self.path) and os.path.exists(self.meta_path)
+
+    def load_meta(self):
+        if not os.path.exists(self.meta_path):
+            return {}
+        with open(self.meta_path, encoding='utf-8') as f:
+            return json.load(f)
+
+    @property
+    def high_water_mark(self):
+        return self.load_meta().get('high_water_mark')
+
+    def load(self):
+        """Return the snapshot as a dict keyed by the store's key."""
+        return {record[self.key]: record for record in self.iter_records()}
+
+    def iter_records(self):
+        """Yield records one by one without loading the whole file."""
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def writer(self, high_water_mark_limit=None):
+        """Return a SnapshotWriter replacing this snapshot once committed."""
+        return SnapshotWriter(self, high_water_mark_limit)
+
+    def write_through(self, records, high_water_mark_limit=None):
+        """
+        Yield records while saving them as the new snapshot, skipping repeated keys.
+        The snapshot is replaced only once the consumer exhausts the generator,
+        so an interrupted run leaves the previous snapshot untouched.
+        """
+        writer = self.writer(high_water_mark_limit)
+        try:
+            for record in records:
+                if writer.write(record):
+                    yield record
+        except BaseException:
+            writer.abort()
+            raise
+        writer.commit()
+
+    def save(self, records, high_water_mark_limit=None):
+        """Replace the snapshot with the given records (iterable of dicts) and return their number."""
+        count = 0
+        for _ in self.write_through(records, high_water_mark_limit):
+            count += 1
+        return count
+
+
+class SnapshotWriter:
+    """
+    Writes records to a temporary file, which replaces the snapshot on commit().
+    A record whose key was already written is skipped - pages that shifted during
+    a crawl can hand over the same record twice.
+    The high-water mark is the newest edit_date among the written records, but not newer
+    than `high_water_mark_limit` (an edit_date string): records downloaded before then
+    could have been edited again without showing it.
+    """
+
+    def __init__(self, store, high_water_mark_limit=None):
+        self.store = store
+        self.tmp_path = f'{store.path}.tmp'
+        self.file = open(self.tmp_path, 'w', encoding='utf-8')
+        self.high_water_mark = None
+        self.high_water_mark_limit = high_water_mark_limit
+        self.keys = set()
+        self.count = 0
+        self.duplicates = 0
+
+    def write(self, record):
+        """Write a record. Returns False when its key was already written."""
+        key = record.get(self.store.key)
+        if key is not None:
+            if key in self.keys:
+                self.duplicates += 1
+                return False
+            self.keys.add(key)
+
+        self.file.write(json.dumps(record, ensure_ascii=False))
+        self.file.write('\n')
+        self.count += 1
+        edit_date = record.get('edit_date')
+        if edit_date and (self.high_water_mark is None or edit_date > self.high_water_mark):
+            self.high_water_mark = edit_date
+        return True
+
+    def commit(self):
+        self.file.close()
+        os.replace(self.tmp_path, self.store.path)
+        if self.duplicates:
+            print(f'Skipped {self.duplicates} repeated records of {os.path.basename(self.store.path)}.')
+        if self.high_water_mark and self.high_water_mark_limit and self.high_water_mark > self.high_water_mark_limit:
+            self.high_water_mark = self.high_water_mark_limit
+        with open(self.store.meta_path, 'w', encoding='utf-8') as f:
+            json.dump({'high_water_mark': self.high_water_mark, 'count': self.count}, f)
+        return self.count
+
+    def abort(self):
+        self.file.close()
+        os.remove(self.tmp_path)
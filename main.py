@@ -1,7 +1,5 @@
 import config
-from connections import ShoperAPIClient, GSheetsClient
-import os
-import pandas as pd
+from connections.metrics import metrics
 
 def get_user_action():
     return str(input(f'''
@@ -13,39 +11,100 @@ q żeby wyjść.
 Akcja: '''))
 
 
-def main():
+# Clients (and pandas, gspread, requests behind them) are imported only when an action needs them
+
+def create_shoper_client():
+    """Create the Shoper client selected by config.SHOPER_ASYNC."""
+    if config.SHOPER_ASYNC:
+        from connections.shoper_async import BlockingShoperAPIClient as ShoperClient
+    else:
+        from connections import ShoperAPIClient as ShoperClient
 
-    shoper_client = ShoperAPIClient(
-        site_url=os.getenv(f'SHOPERSITE_{config.SITE}'),
-        login=os.getenv(f'LOGIN_{config.SITE}'),
-        password=os.getenv(f'PASSWORD_{config.SITE}')
+    return ShoperClient(
+        site_url=config.get_env(f'SHOPERSITE_{config.SITE}'),
+        login=config.get_env(f'LOGIN_{config.SITE}'),
+        password=config.get_env(f'PASSWORD_{config.SITE}')
     )
-    
+
+
+def create_gsheets_client(sheet_name, key_column=config.GSHEETS_KEY_COLUMN):
+    from connections import GSheetsClient
+
     gsheets_client = GSheetsClient(
         credentials=config.CREDENTIALS_FILE,
         sheet_id=config.SHEET_ID,
-        sheet_name=config.SHEET_NAME
+        sheet_name=sheet_name,
+        key_column=key_column
     )
+    gsheets_client.connect()
+    return gsheets_client
+
+
+def download_products(shoper_client):
+    """Download all Shoper data. Returns True when every resource was downloaded."""
+    shoper_client.connect()
+    results = shoper_client.get_all_data()
+    return all(result['status'] == 'ok' for result in results.values())
+
+
+def generate_report(shoper_client, download=False, upload=True):
+    """Build the dimensions report and save it to Google Sheets. Returns True on success."""
+    if download:
+        shoper_client.connect()
+    all_products = shoper_client.get_all_active_products_formatted(download=download)
+    # all_products.to_excel(os.path.join(config.SHEETS_DIR, 'ready_products.xlsx'), index=False)
+    if not upload:
+        return True
+
+    if not create_gsheets_client(config.SHEET_NAME).save_data(all_products):
+        print('Failed to save data to Google Sheets. Try again later')
+        return False
+    return True
+
+
+def generate_allegro_report(shoper_client, upload=True):
+    """Find Allegro offers of products without dimensions and save them to Google Sheets. Returns True on success."""
+    from connections import Allegro
+
+    all_products = shoper_client.get_all_active_products_formatted()
+    allegro_offers = Allegro().find_offers_missing_dimensions(all_products)
+    if not upload:
+        return True
+
+    allegro_gsheets_client = create_gsheets_client(config.ALLEGRO_SHEET_NAME, key_column=config.ALLEGRO_OFFER_ID_COLUMN)
+    if not allegro_gsheets_client.save_data(allegro_offers):
+        print('Failed to save data to Google Sheets. Try again later')
+        return False
+    return True
+
+
+def main():
+
+    config.init_directories()
+    shoper_client = None
+    actions = {
+        '1': download_products,
+        '2': generate_report,
+        '3': generate_allegro_report,
+    }
 
     while True:
         action = get_user_action()
-        if action == '1':
-            shoper_client.connect()
-            shoper_client.get_all_data()
-        if action == '2':
-            all_products = shoper_client.get_all_active_products_formatted()
-            # all_products.to_excel(os.path.join(config.SHEETS_DIR, 'ready_products.xlsx'), index=False)
-            gsheets_client.connect()
-            
-            if not gsheets_client.save_data(all_products):
-                print('Failed to save data to Google Sheets. Try again later')
-        elif action == '3':
-            pass
-        elif action == 'q':
+        if action == 'q':
+            if shoper_client is not None:
+                shoper_client.close()
             print('Do zobaczenia!')
             break
-        else:
+        elif action not in actions:
             print('Nie ma takiego wyboru :/')
+            continue
+
+        if shoper_client is None:
+            shoper_client = create_shoper_client()
+
+        metrics.reset()
+        actions[action](shoper_client)
+        metrics.finish_run()
 
 if __name__ == "__main__":
     main()